@@ -1,29 +1,38 @@
+import os
 from google.adk.agents.llm_agent import Agent
-from google.adk.models.google_llm import Gemini
-from google.genai.types import HttpRetryOptions
 
 import logging
 logger = logging.getLogger(__name__)
 
 from .src.agent_persona import DAEDALUS_PERSONA
-from .src.agent_tools import get_payment_link, generate_prompts, generate_calendar
+from .src.agent_tools import get_payment_link, generate_prompts, generate_calendar, regenerate_months, preview_calendar
+from .src.bulk import generate_bulk_order
+from .src.template_store import template_store
+from .src.models import InstrumentedGemini
+from .src.telemetry import instrument_tool, start_metrics_server
 
-retry_config=HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1, # Initial delay before first retry (in seconds)
-    http_status_codes=[429, 500, 503, 504] # Retry on these HTTP errors
-)
+# Optionally warm the template store at startup, e.g. DAEDALUS_PRELOAD_TEMPLATES="1K,2K"
+preload_resolutions = os.environ.get("DAEDALUS_PRELOAD_TEMPLATES", "")
+if preload_resolutions:
+    template_store.preload([r.strip() for r in preload_resolutions.split(",") if r.strip()])
+
+# Optionally serve /metrics, /metrics.json and /traces.json, e.g. DAEDALUS_METRICS_PORT=9464
+metrics_port = os.environ.get("DAEDALUS_METRICS_PORT", "")
+if metrics_port:
+    start_metrics_server(int(metrics_port))
 
 root_agent = Agent(
-    model=Gemini(
-        model="gemini-2.5-flash",
-        retry_options=retry_config
-    ),
+    # Shares the process-wide client and its retry settings (see src/clients.py)
+    model=InstrumentedGemini(model="gemini-2.5-flash"),
     name='daedalus',
     description='Daedalus, a experienced designer at Invysia',
     instruction=DAEDALUS_PERSONA,
-    tools=[get_payment_link, generate_prompts, generate_calendar],
+    tools=[
+        instrument_tool(tool)
+        for tool in (
+            get_payment_link, generate_prompts, preview_calendar, generate_calendar, regenerate_months, generate_bulk_order
+        )
+    ],
 )
 
 logger.info("Daedalus agent initialized")
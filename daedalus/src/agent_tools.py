@@ -1,23 +1,33 @@
 import asyncio
-import random
-import re
 import os
 import time
-from typing import List, Any
-from PIL import Image
-from google import genai
+from pathlib import Path
+from typing import AsyncGenerator, List, Any, Optional, Union
 from google.genai import types
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
 from google.adk.tools.tool_context import ToolContext
-from google.adk.tools import AgentTool
-from .sub_agents import prompt_generator
+from .backend import get_backend, IMAGE_MODEL
+from .template_store import template_store, TemplatePayload, RESOLUTION_SCALE
+from .result_cache import image_cache, image_cache_key
+from .jobs import CalendarJob, calendar_job_id, OUTPUT_DIR
+from .workers import worker_pool, encode_image, derive_images, write_bytes, output_extension, THUMBNAIL_MIME_TYPE
+from .scheduler import image_scheduler, tier_priority, DEFAULT_PRIORITY
+from .telemetry import telemetry
+from .prompt_cache import prompt_cache
+from .prompts import parse_prompt_output, missing_months
+from .packaging import package_calendar, PACKAGE_FORMATS
+from .resilience import image_latency, image_hedge_budget, image_circuit, hedged_call, CircuitOpenError
 import logging
 
 logger = logging.getLogger(__name__)
 
-client = genai.Client(
-    api_key=os.environ["GOOGLE_API_KEY"],
-    http_options=types.HttpOptions(timeout=60000)
-)
+# Draft previews render a few months at the cheapest resolution
+PREVIEW_RESOLUTION = "1K"
+PREVIEW_MONTH_COUNT = int(os.environ.get("DAEDALUS_PREVIEW_MONTHS", "3"))
+
+# Follow-up calls that ask the prompt repairer for only the missing months
+MAX_PROMPT_REPAIRS = 2
 
 def get_payment_link() -> dict:
     """
@@ -29,6 +39,63 @@ def get_payment_link() -> dict:
     return {"status": "success", "payment_link": "https://invysia.store/payment/mock-link-12345"}
 
 
+async def build_prompt_set(theme: str, tool_context: ToolContext, exclude: Optional[list] = None) -> List[str]:
+    """
+    Returns 12 prompts for a theme, from the prompt cache or the prompt generator.
+
+    Does not touch the session state, so callers decide what the prompts are for.
+
+    Args:
+        theme (str): The theme for the prompts.
+        tool_context (ToolContext): The tool context, used to run the sub-agents.
+        exclude (list): A prompt set not to return from the cache, e.g. the one the user wants replaced.
+
+    Returns:
+        List[str]: The prompts; fewer than 12 if the generator could not be repaired.
+    """
+    # 1. Reuse a validated prompt set for the same theme (or, if enabled, one of this user's near-identical themes).
+    cached = await worker_pool.run_io(prompt_cache.get, theme, exclude=exclude, user_id=tool_context.user_id)
+    if cached is not None:
+        prompts, matched_theme, similarity = cached
+        logger.info(f"Using cached prompts for theme: {theme} (matched '{matched_theme}', similarity {similarity:.2f})")
+        return prompts
+
+    # 2. Run the prompt_generator sub-agent (as an AgentTool) through the model backend.
+    # Its output is schema-constrained JSON with one entry per month.
+    logger.info(f"Generating prompts for theme: {theme}")
+    backend = get_backend()
+    async with telemetry.span("prompts.generate", theme=theme) as span:
+        try:
+            raw_output: Any = await backend.generate_prompts(theme, tool_context)
+        except ValueError as e:
+            # Unparseable structured output; every month gets repaired below
+            logger.warning(f"Prompt generator returned invalid output: {e}")
+            raw_output = None
+        span.set(output_bytes=len(str(raw_output)))
+
+    # 3. Keep the valid month entries and re-request only the missing ones
+    by_month = parse_prompt_output(raw_output)
+    for attempt in range(MAX_PROMPT_REPAIRS):
+        missing = missing_months(by_month)
+        if not missing:
+            break
+        logger.warning(f"Repairing prompts for months {missing} (attempt {attempt + 1}/{MAX_PROMPT_REPAIRS})")
+        telemetry.incr("daedalus_prompt_repairs_total", len(missing))
+        async with telemetry.span("prompts.repair", months=len(missing)):
+            try:
+                repaired = parse_prompt_output(await backend.repair_prompts(theme, missing, by_month, tool_context))
+            except ValueError as e:
+                logger.warning(f"Prompt repairer returned invalid output: {e}")
+                repaired = {}
+        by_month.update({month: prompt for month, prompt in repaired.items() if month in missing})
+
+    prompts: List[str] = [by_month[month] for month in sorted(by_month)]
+
+    # Only sets that pass validation are cached
+    await worker_pool.run_io(prompt_cache.put, theme, prompts, user_id=tool_context.user_id)
+    return prompts
+
+
 async def generate_prompts(
     theme: str,
     tool_context: ToolContext,
@@ -42,175 +109,587 @@ async def generate_prompts(
     Returns:
         List[str]: A list of prompts.
     """
+    # If the user already has exactly the cached set, they are asking for new prompts
+    prompts = await build_prompt_set(theme, tool_context, exclude=tool_context.state.get("user:prompts"))
 
-    # 1. Wrap the agent as a tool
-    logger.info(f"Generating prompts for theme: {theme}")
-    agent_tool = AgentTool(agent=prompt_generator)
-
-    # 2. Call the agent as a tool
-    raw_output: Any = await agent_tool.run_async(
-        args={"request": theme},
-        tool_context=tool_context,
-    )
-
-    # 3. Normalize the output into a Python list of strings
-    import ast
-    prompts: List[str]
-
-    if isinstance(raw_output, list):
-        prompts = [str(p) for p in raw_output]
-    elif isinstance(raw_output, str):
-        try:
-            # Strip markdown code blocks (e.g., ```python ... ```)
-            clean_output = re.sub(r"^```[a-zA-Z]*\s*", "", raw_output.strip())
-            clean_output = re.sub(r"\s*```$", "", clean_output)
-            
-            # Try to parse Python-list-like text:
-            parsed = ast.literal_eval(clean_output)
-            if isinstance(parsed, list):
-                prompts = [str(p) for p in parsed]
-            else:
-                prompts = [raw_output]
-        except Exception as e:
-            # Fallback: single big string
-            logger.warning(f"Failed to parse prompt output as list: {e}. Using raw output.")
-            prompts = [raw_output]
-    else:
-        # Very defensive fallback:
-        prompts = [str(raw_output)]
-
-    # 4. Store in persistent user state
+    # Store in persistent user state
     tool_context.state["user:prompts"] = prompts  # "user:" prefix = per-user persistence
+    # A new prompt set invalidates any earlier draft preview
+    tool_context.state["user:preview"] = None
 
-    # 5. Also return them to the caller
+    # Also return them to the caller
     return prompts
 async def generate_calendar(
     aspect_ratio: str,
     resolution: str,
     tool_context: ToolContext,
-) -> str:
+    tier: str = "Value",
+) -> AsyncGenerator[Union[Event, str], None]:
     """
     Generates a calendar and delivers it to the user.
 
+    Each month is delivered as an artifact in its own event as soon as it is
+    ready, together with the `user:calendar_progress` state.
+
     Args:
         aspect_ratio (str): The aspect ratio of the calendar images (e.g., "9:16").
-        resolution (str): The resolution of the calendar images (e.g., "1K").
+        resolution (str): The resolution of the calendar images (e.g., "1K"). Several comma-separated
+            resolutions (e.g., "1K,4K") render once at the highest and derive the others locally.
         tool_context (ToolContext): The tool context to access state.
+        tier (str): The product tier purchased by the user (e.g., "Premium"), used to prioritise the order.
 
-    Returns:
-        str: A message indicating the result of the generation.
+    Yields:
+        Event: One per delivered month, carrying its artifacts and the progress state.
+        str: Finally, a message indicating the result of the generation.
     """
+    try:
+        deliverables = _parse_resolutions(resolution)
+    except ValueError as e:
+        yield f"Error: {e}"
+        return
+    # Render once at the highest purchased resolution
+    resolution = deliverables[-1]
+
     prompts = tool_context.state.get("user:prompts", [])
     
     if not prompts or len(prompts) != 12:
         logger.error(f"Invalid number of prompts found: {len(prompts) if prompts else 0}")
-        return "Error: Could not find exactly 12 prompts in user state. Please generate prompts first."
+        yield "Error: Could not find exactly 12 prompts in user state. Please generate prompts first."
+        return
 
     logger.info(f"Starting calendar generation with {len(prompts)} prompts")
 
-    # Generate output folder name with random 3-digit number
-    output_folder = f"output_{random.randint(100, 999)}"
-    # Create the output folder if it doesn't exist
-    os.makedirs(output_folder, exist_ok=True)
-
-    # Save prompts to a file in the output folder
-    with open(f"{output_folder}/prompts.txt", "w") as f:
-        for prompt in prompts:
-            f.write(prompt + "\n")
-
-    # Map aspect ratio to template folder name
-    # Assuming aspect_ratio format like "9:16" maps to "9_16"
-    template_folder_name = aspect_ratio.replace(":", "_")
-    template_base_path = f"daedalus/templates/{template_folder_name}"
-
-    tasks = []
-    for i, prompt in enumerate(prompts, start=1):
-        template_path = f"{template_base_path}/{i}-2026.png"
-        output_path = f"{output_folder}/{i}-2026.png"
-        
+    # Templates are loaded, validated and encoded once per process
+    try:
+        templates = await template_store.get_payloads(aspect_ratio, resolution)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Template loading failed: {e}")
+        yield f"Error: {e}. Please check aspect ratio, resolution and template files."
+        return
+
+    # Orders map to a deterministic job, so re-running one resumes it
+    job = await worker_pool.run_io(
+        CalendarJob.open, tool_context.user_id, prompts, aspect_ratio, resolution, deliverables=deliverables
+    )
+    tool_context.state["user:calendar_job"] = job.job_id
+    async for item in _render_calendar_job(job, templates, tool_context, tier):
+        yield item
+
+
+async def preview_calendar(
+    aspect_ratio: str,
+    tool_context: ToolContext,
+    months: Optional[List[int]] = None,
+    prompt_edits: Optional[List[str]] = None,
+) -> str:
+    """
+    Renders a quick, low-cost draft of a few calendar months so the user can approve the look before the full render.
+
+    Args:
+        aspect_ratio (str): The aspect ratio of the calendar images (e.g., "9:16").
+        tool_context (ToolContext): The tool context to access state.
+        months (Optional[List[int]]): The months to preview, 1 for January to 12 for December.
+            Defaults to a few months spread over the year.
+        prompt_edits (Optional[List[str]]): Optional new prompts, one per entry in `months` and in the
+            same order. Edits are saved to the user's prompts, so the final calendar uses them verbatim.
+
+    Returns:
+        str: A message indicating the result of the preview.
+    """
+    prompts = list(tool_context.state.get("user:prompts", []))
+    if not prompts or len(prompts) != 12:
+        logger.error(f"Invalid number of prompts found: {len(prompts) if prompts else 0}")
+        return "Error: Could not find exactly 12 prompts in user state. Please generate prompts first."
+
+    try:
+        edits = _month_edits(months or _spread_months(PREVIEW_MONTH_COUNT), prompt_edits)
+    except ValueError as e:
+        return f"Error: {e}"
+    months = sorted(edits)
+    _apply_month_edits(prompts, edits)
+    tool_context.state["user:prompts"] = prompts
+
+    try:
+        templates = await template_store.get_payloads(aspect_ratio, "preview")
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Template loading failed: {e}")
+        return f"Error: {e}. Please check aspect ratio and template files."
+
+    logger.info(f"Rendering draft preview of months {months}")
+    preview_folder = OUTPUT_DIR / f"preview_{calendar_job_id(tool_context.user_id, prompts, aspect_ratio, 'preview')}"
+
+    async def render_month(month: int):
         try:
-            template_image = Image.open(template_path)
-        except FileNotFoundError:
-             logger.error(f"Template file not found: {template_path}")
-             return f"Error: Template file not found at {template_path}. Please check aspect ratio and template files."
-
-        prompt_contents = [prompt, template_image]
-        
-        # Create async task
-        task = asyncio.create_task(
-            generate_images_gemini_3_pro(
-                prompt_contents=prompt_contents,
+            image_bytes, mime_type = await generate_images_gemini_3_pro(
+                prompt=prompts[month - 1],
+                template=templates[month - 1],
                 aspect_ratio=aspect_ratio,
-                resolution=resolution,
-                output_path=output_path
+                resolution=PREVIEW_RESOLUTION,
+                output_path=str(preview_folder / f"{month}-2026.png"),
+                order_id=tool_context.invocation_id,
             )
-        )
-        tasks.append(task)
+            return month, image_bytes, mime_type, None
+        except Exception as e:
+            return month, None, None, e
 
-    # Wait for all tasks to complete
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # Check for exceptions in results
     failures = []
-    for i, result in enumerate(results, start=1):
-        if isinstance(result, Exception):
-            failures.append(f"Image {i}: {str(result)}")
-    
+    artifacts = {}
+    for next_done in asyncio.as_completed([render_month(m) for m in months]):
+        month, image_bytes, mime_type, error = await next_done
+        if error is not None:
+            logger.error(f"Preview of month {month} failed: {error}")
+            failures.append(f"Month {month}: {error}")
+            continue
+        filename = f"preview-{month}-2026{output_extension(mime_type)}"
+        version = await tool_context.save_artifact(
+            filename=filename,
+            artifact=types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+        )
+        artifacts[str(month)] = {"filename": filename, "version": version}
+
+    tool_context.state["user:preview"] = {
+        "aspect_ratio": aspect_ratio,
+        "months": sorted(int(m) for m in artifacts),
+        "prompts": {m: prompts[int(m) - 1] for m in artifacts},
+        "artifacts": artifacts,
+    }
     if failures:
+        return "Preview completed with some errors:\n" + "\n".join(failures)
+    return f"Draft preview of months {months} delivered as artifacts. The final calendar will use these exact prompts."
+
+
+def _spread_months(count: int) -> list:
+    """Picks `count` months spread evenly over the year, e.g. 3 -> [1, 7, 12]."""
+    count = max(1, min(12, count))
+    if count == 1:
+        return [1]
+    return sorted({round(i * 11 / (count - 1)) + 1 for i in range(count)})
+
+
+def _month_edits(months: list, prompt_edits: Optional[list]) -> dict:
+    """
+    Pairs each selected month with its prompt edit, in the order the user gave them.
+
+    Returns:
+        dict: {month: edit}, where an empty edit keeps the month's prompt.
+
+    Raises:
+        ValueError: For months that are not numbers from 1 to 12, a wrong number of edits, or a
+            month listed twice together with edits.
+    """
+    try:
+        months = [int(m) for m in months]
+    except (TypeError, ValueError):
+        # e.g. "March" instead of 3
+        months = None
+    if months is None or any(m < 1 or m > 12 for m in months):
+        raise ValueError("Months must be numbers from 1 (January) to 12 (December).")
+    edits = list(prompt_edits or [])
+    if not edits:
+        return {month: "" for month in months}
+    if len(edits) != len(months):
+        raise ValueError("Provide exactly one prompt edit per selected month (use an empty string to keep a prompt).")
+    if len(set(months)) != len(months):
+        raise ValueError("List each month only once when giving prompt edits.")
+    return dict(zip(months, edits))
+
+
+def _apply_month_edits(prompts: list, edits: dict):
+    for month, edit in edits.items():
+        if edit and edit.strip():
+            prompts[month - 1] = edit.strip()
+
+
+def _parse_resolutions(resolution: str) -> list:
+    """Parses "1K" or "1K, 4K" into a de-duplicated list ordered from smallest to largest."""
+    resolutions = {r.strip().upper() for r in resolution.split(",") if r.strip()}
+    unknown = resolutions - set(RESOLUTION_SCALE)
+    if not resolutions or unknown:
+        raise ValueError(f"Unsupported resolution: {resolution}. Supported: {', '.join(RESOLUTION_SCALE)}")
+    return sorted(resolutions, key=RESOLUTION_SCALE.get)
+
+
+async def regenerate_months(
+    months: List[int],
+    tool_context: ToolContext,
+    prompt_edits: Optional[List[str]] = None,
+    tier: str = "Value",
+) -> AsyncGenerator[Union[Event, str], None]:
+    """
+    Re-renders only the selected months of the user's latest calendar, keeping every other month as is.
+
+    Args:
+        months (List[int]): The months to regenerate, 1 for January to 12 for December.
+        tool_context (ToolContext): The tool context to access state.
+        prompt_edits (Optional[List[str]]): Optional new prompts, one per entry in `months` and in
+            the same order. An empty string keeps that month's current prompt and just renders a new variation.
+        tier (str): The product tier purchased by the user (e.g., "Premium"), used to prioritise the order.
+
+    Yields:
+        Event: One per delivered month, carrying its artifacts and the progress state.
+        str: Finally, a message indicating the result of the regeneration.
+    """
+    job_id = tool_context.state.get("user:calendar_job")
+    previous = await worker_pool.run_io(CalendarJob.load, job_id) if job_id else None
+    if previous is None:
+        yield "Error: No generated calendar found. Please generate the calendar first."
+        return
+
+    try:
+        edits = _month_edits(months, prompt_edits)
+    except ValueError as e:
+        yield f"Error: {e}"
+        return
+    months = sorted(edits)
+    if not months:
+        yield "Error: Months must be numbers from 1 (January) to 12 (December)."
+        return
+
+    prompts = [previous.month(m)["prompt"] for m in range(1, 13)]
+    _apply_month_edits(prompts, edits)
+    tool_context.state["user:prompts"] = prompts
+    logger.info(f"Regenerating months {months} of job {previous.job_id}")
+
+    aspect_ratio = previous.manifest["aspect_ratio"]
+    resolution = previous.manifest["resolution"]
+    try:
+        templates = await template_store.get_payloads(aspect_ratio, resolution)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Template loading failed: {e}")
+        yield f"Error: {e}. Please check aspect ratio, resolution and template files."
+        return
+
+    # Edited prompts give a new job; unchanged months are carried over from the previous one
+    job = await worker_pool.run_io(
+        CalendarJob.open,
+        tool_context.user_id,
+        prompts,
+        aspect_ratio,
+        resolution,
+        deliverables=previous.manifest.get("deliverables"),
+    )
+    if job.job_id != previous.job_id:
+        await worker_pool.run_io(job.adopt, previous)
+    for month in months:
+        if prompts[month - 1] == previous.month(month)["prompt"]:
+            # Same prompt: ask for a new variation rather than the cached image
+            await worker_pool.run_io(job.reset, month, new_variant=True)
+    tool_context.state["user:calendar_job"] = job.job_id
+    async for item in _render_calendar_job(job, templates, tool_context, tier):
+        yield item
+
+
+async def _render_calendar_job(
+    job: CalendarJob, templates: list, tool_context: ToolContext, tier: str
+) -> AsyncGenerator[Union[Event, str], None]:
+    """
+    Renders the pending months of a job, delivering each one as soon as it is ready.
+
+    Tool results and their state and artifact changes only reach the session
+    when the tool returns, so each month is yielded as its own event instead;
+    ADK runs generator tools as nodes that emit every yielded event right away.
+    The final message is yielded last.
+    """
+    aspect_ratio = job.manifest["aspect_ratio"]
+    resolution = job.manifest["resolution"]
+    deliverables = job.manifest.get("deliverables", [resolution])
+    # Smaller deliverables are resampled locally from the rendered image
+    scales = {res: RESOLUTION_SCALE[res] / RESOLUTION_SCALE[resolution] for res in deliverables if res != resolution}
+    output_folder = str(job.folder)
+    total = len(job.manifest["months"])
+    pending_months = await worker_pool.run_io(job.pending_months)
+    if len(pending_months) < total:
+        logger.info(f"Job {job.job_id}: {total - len(pending_months)} months already done, rendering {pending_months}")
+
+    order_id = tool_context.invocation_id
+    priority = tier_priority(tier)
+
+    async def render_month(month: int, template: TemplatePayload):
+        # Never raise, so the month index survives asyncio.as_completed
+        entry = job.month(month)
+        try:
+            async with telemetry.span("calendar.month", job_id=job.job_id, month=month):
+                image_bytes, mime_type = await generate_images_gemini_3_pro(
+                    prompt=entry["prompt"],
+                    template=template,
+                    aspect_ratio=aspect_ratio,
+                    resolution=resolution,
+                    output_path=str(job.output_path(month)),
+                    order_id=order_id,
+                    priority=priority,
+                    variant=entry.get("variant", 0),
+                )
+                async with telemetry.span("image.derive", variants=len(scales)):
+                    derived_images, preview_bytes = await worker_pool.run_cpu(derive_images, image_bytes, scales)
+
+                # Preview first, so chat can show something small right away
+                artifacts = [(f"{month}-2026-preview.jpg", preview_bytes, THUMBNAIL_MIME_TYPE)]
+                async with telemetry.span("image.save") as span:
+                    await worker_pool.run_io(write_bytes, job.preview_path(month), preview_bytes)
+                    derived = {}
+                    for res, (data, derived_mime) in derived_images.items():
+                        path = job.derived_path(month, res, derived_mime)
+                        await worker_pool.run_io(write_bytes, path, data)
+                        derived[res] = str(path.relative_to(job.folder))
+                        artifacts.append((_artifact_name(month, res, derived_mime, deliverables), data, derived_mime))
+                    artifacts.append((_artifact_name(month, resolution, mime_type, deliverables), image_bytes, mime_type))
+
+                    await worker_pool.run_io(
+                        job.mark_done, month, image_bytes, mime_type,
+                        derived=derived, preview=str(job.preview_path(month).relative_to(job.folder)),
+                    )
+                    span.set(bytes=len(preview_bytes) + sum(len(data) for data, _ in derived_images.values()))
+            return month, artifacts, None
+        except Exception as e:
+            await worker_pool.run_io(job.mark_failed, month, e)
+            return month, None, e
+
+    tasks = [
+        asyncio.create_task(render_month(month, templates[month - 1]))
+        for month in pending_months
+    ]
+
+    progress = {
+        "job_id": job.job_id,
+        "output_folder": output_folder,
+        "total": total,
+        "completed": [m for m in job.done_months() if m not in pending_months],
+        "failed": {},
+        "artifacts": {},
+    }
+    _publish_progress(tool_context, progress)
+    yield Event()
+
+    # Deliver each month as soon as it is ready instead of waiting for the slowest one
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            month, artifacts, error = await next_done
+            if error is not None:
+                logger.error(f"Month {month} failed: {error}")
+                progress["failed"][str(month)] = str(error)
+                _publish_progress(tool_context, progress)
+                yield Event()
+                continue
+            delivered = []
+            async with telemetry.span("artifacts.save", month=month, count=len(artifacts)) as span:
+                for filename, data, mime_type in artifacts:
+                    version = await tool_context.save_artifact(
+                        filename=filename,
+                        artifact=types.Part.from_bytes(data=data, mime_type=mime_type),
+                    )
+                    delivered.append({"filename": filename, "version": version})
+                span.set(bytes=sum(len(data) for _, data, _ in artifacts))
+            progress["completed"].append(month)
+            progress["artifacts"][str(month)] = delivered
+            logger.info(f"Month {month} delivered ({len(progress['completed'])}/{total})")
+            _publish_progress(tool_context, progress)
+            yield Event(actions=EventActions(artifact_delta={d["filename"]: d["version"] for d in delivered}))
+    finally:
+        # The caller stopped listening (e.g. the run was cancelled); don't render for nobody
+        for task in tasks:
+            task.cancel()
+
+    if progress["failed"]:
+        failures = [f"Image {month}: {error}" for month, error in sorted(progress["failed"].items(), key=lambda kv: int(kv[0]))]
         logger.error(f"Calendar generation completed with errors: {failures}")
-        return f"Calendar generation completed with some errors:\n" + "\n".join(failures) + f"\nOutput folder: {output_folder}"
+        yield (
+            f"Calendar generation completed with some errors:\n" + "\n".join(failures)
+            + f"\nDelivered months: {sorted(progress['completed'])}\nOutput folder: {output_folder}"
+            + "\nCall generate_calendar again with the same arguments to retry only the failed months."
+        )
+        return
 
     logger.info(f"Calendar generation completed successfully in {output_folder}")
-    return f"Calendar generated successfully in folder: {output_folder}"
+    packaged = await _package_calendar_job(job, tool_context)
+    if not pending_months:
+        yield f"Calendar is already complete in folder: {output_folder}. Nothing needed regenerating.{packaged}"
+    elif len(pending_months) < total:
+        yield f"Months {pending_months} generated successfully in folder: {output_folder}. The other months are unchanged.{packaged}"
+    else:
+        yield f"Calendar generated successfully in folder: {output_folder}. All {total} months were delivered as artifacts.{packaged}"
 
 
-async def generate_images_gemini_3_pro(prompt_contents: list[str], aspect_ratio: str, resolution: str, output_path: str):
+async def _package_calendar_job(job: CalendarJob, tool_context: ToolContext) -> str:
+    """Builds the ZIP and PDF packages of a complete job; returns a sentence for the tool result."""
+    if not PACKAGE_FORMATS:
+        return ""
+    try:
+        packages = await package_calendar(job, tool_context)
+    except Exception as e:
+        # The months are already delivered; a missing bundle must not fail the order
+        logger.error(f"Packaging job {job.job_id} failed: {e}")
+        return " The ZIP/PDF packages could not be built."
+    tool_context.state["user:calendar_packages"] = packages
+    delivered = [info["artifact"] for info in packages.values() if info["artifact"]]
+    on_disk = [info["path"] for info in packages.values() if not info["artifact"]]
+    message = ""
+    if delivered:
+        message += f" Packages delivered as artifacts: {', '.join(delivered)}."
+    if on_disk:
+        message += f" Packages too large for chat, available at: {', '.join(on_disk)}."
+    return message
+
+
+def _artifact_name(month: int, resolution: str, mime_type: str, deliverables: list) -> str:
+    # Only label files with their resolution when more than one size is delivered
+    suffix = f"-{resolution}" if len(deliverables) > 1 else ""
+    return f"{month}-2026{suffix}{output_extension(mime_type)}"
+
+
+def _publish_progress(tool_context: ToolContext, progress: dict):
+    # State deltas are only recorded on assignment, so always store a fresh copy.
+    # The delta goes out with the next event the tool yields.
+    tool_context.state["user:calendar_progress"] = {
+        **progress,
+        "completed": sorted(progress["completed"]),
+        "failed": dict(progress["failed"]),
+        "artifacts": dict(progress["artifacts"]),
+    }
+
+
+async def generate_images_gemini_3_pro(
+    prompt: str,
+    template: TemplatePayload,
+    aspect_ratio: str,
+    resolution: str,
+    output_path: str,
+    order_id: str = "default",
+    priority: int = DEFAULT_PRIORITY,
+    variant: int = 0,
+):
     """
     Generates images using the Gemini 3 Pro model.
 
+    Results are served from the content-addressed image cache when the exact
+    same request was rendered before; concurrent identical requests share one
+    model call.
+
     Args:
-        prompt_contents: A list of strings representing the prompt for image generation.
+        prompt: The edit prompt for the image.
+        template: The calendar template payload the prompt applies to.
         aspect_ratio: The desired aspect ratio of the generated image (e.g., "16:9").
         resolution: The desired resolution of the generated image (e.g., "1K").
-        output_path: The file path where the generated image should be saved.
+        output_path: The file path where the generated image should be saved. Its extension is
+            replaced to match the configured output format (see DAEDALUS_OUTPUT_FORMAT).
+        order_id: The order this image belongs to, for fair scheduling between orders.
+        priority: The scheduling priority of the order (see `tier_priority`).
+        variant: Non-zero values request a different rendering of the same inputs.
+
+    Returns:
+        tuple: (image bytes, mime type) of the generated image.
+    """
+    key = image_cache_key(IMAGE_MODEL, prompt, template.sha256, aspect_ratio, resolution, variant)
+    image_bytes, mime_type = await image_cache.get_or_render(
+        key,
+        lambda: _render_image([prompt, template.part], aspect_ratio, resolution, order_id, priority, variant),
+    )
+
+    # Encoding and disk writes are far too slow for the event loop at 2K/4K
+    async with telemetry.span("image.encode") as span:
+        image_bytes, mime_type = await worker_pool.run_cpu(encode_image, image_bytes, mime_type)
+        span.set(bytes=len(image_bytes))
+    async with telemetry.span("image.write", bytes=len(image_bytes)):
+        await worker_pool.run_io(write_bytes, Path(output_path).with_suffix(output_extension(mime_type)), image_bytes)
+    return image_bytes, mime_type
+
+
+async def _render_image(
+    prompt_contents: list,
+    aspect_ratio: str,
+    resolution: str,
+    order_id: str,
+    priority: int,
+    variant: int = 0,
+) -> tuple:
     """
+    Calls the image model backend, going through the process-wide scheduler on every attempt.
+
+    Each attempt is cut off at an adaptive timeout derived from recent latencies
+    at this resolution, and hedged with a duplicate call once it runs past the
+    usual p95 (within the hedge budget). While the image model is failing, the
+    circuit breaker rejects calls immediately with `CircuitOpenError`.
+
+    Returns:
+        tuple: (image bytes, mime type) of the first image in the response.
+
+    Raises:
+        Exception: The last error once all retries are exhausted.
+    """
+    backend = get_backend()
 
     # Retry logic with exponential backoff
     max_retries = 3
     retry_delay = 1  # Initial delay in seconds
-    
-    success = False
-    for attempt in range(max_retries):
+
+    async def model_call(hedge: bool = False):
+        request_bytes = sum(
+            len(c) if isinstance(c, str) else len(c.inline_data.data) if c.inline_data else 0
+            for c in prompt_contents
+        )
+        started = time.monotonic()
+        async with telemetry.span("model.generate_image", backend=backend.name, resolution=resolution, hedge=hedge) as span:
+            span.set(request_bytes=request_bytes)
+            try:
+                image_bytes, mime_type = await backend.generate_image(prompt_contents, aspect_ratio, resolution, seed=variant or None)
+            except asyncio.CancelledError:
+                # Lost to its hedge or hit the timeout; not a latency sample
+                image_latency.on_cancelled(resolution)
+                raise
+            span.set(response_bytes=len(image_bytes))
+        image_latency.observe(resolution, time.monotonic() - started)
+        telemetry.incr("daedalus_model_request_bytes_total", request_bytes, model=IMAGE_MODEL)
+        telemetry.incr("daedalus_model_response_bytes_total", len(image_bytes), model=IMAGE_MODEL)
+        return image_bytes, mime_type
+
+    async def call_model():
+        # Runs in a scheduler slot; a hedge needs a slot of its own, ahead of queued first attempts
+        timeout = image_latency.timeout(resolution)
+        started = time.monotonic()
         try:
-            response = await client.aio.models.generate_content(
-                model="gemini-3-pro-image-preview",
-                contents=prompt_contents,
-                config=types.GenerateContentConfig(
-                    response_modalities=['IMAGE'],
-                    image_config=types.ImageConfig(
-                        aspect_ratio=aspect_ratio,
-                        image_size=resolution
-                    ),
-                )
+            result, _ = await asyncio.wait_for(
+                hedged_call(
+                    model_call,
+                    lambda: image_scheduler.run(order_id, lambda: model_call(hedge=True), priority=0),
+                    image_latency.hedge_delay(resolution),
+                    image_hedge_budget,
+                ),
+                timeout,
             )
-            success = True
-            break  # Success, exit retry loop
+        except asyncio.TimeoutError:
+            # Counted, not sampled: the timeout comes from completed calls only
+            image_latency.on_timeout(resolution)
+            if time.monotonic() - started < timeout:
+                # The request itself timed out
+                raise
+            telemetry.incr("daedalus_image_timeouts_total", resolution=resolution)
+            raise TimeoutError(f"Image generation timed out after {timeout:.0f}s")
+        return result
+
+    async def guarded_call():
+        image_circuit.before_call()
+        try:
+            result = await image_scheduler.run(order_id, call_model, priority=priority)
+        except BaseException as e:
+            image_circuit.on_failure(e)
+            raise
+        image_circuit.on_success()
+        return result
+
+    for attempt in range(max_retries):
+        try:
+            async with telemetry.span("image.attempt", attempt=attempt + 1):
+                return await guarded_call()
+        except CircuitOpenError as e:
+            # Fail fast instead of queueing behind an unhealthy upstream
+            logger.error(f"API call rejected: {e}")
+            raise
         except Exception as e:
+            telemetry.incr("daedalus_image_failures_total", error=type(e).__name__)
             if attempt < max_retries - 1:
-                print(f"API call failed (attempt {attempt + 1}/{max_retries}): {e}")
+                telemetry.incr("daedalus_image_retries_total")
                 logger.warning(f"API call failed (attempt {attempt + 1}/{max_retries}): {e}")
-                print(f"Retrying in {retry_delay} seconds...")
                 await asyncio.sleep(retry_delay)
                 retry_delay *= 2  # Exponential backoff
             else:
-                print(f"API call failed after {max_retries} attempts: {e}")
                 logger.error(f"API call failed after {max_retries} attempts: {e}")
-
-    if success:
-        for part in response.parts:
-            if part.text is not None:
-                print(part.text)
-            elif image:= part.as_image():
-                # Ensure directory exists
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                image.save(output_path)
\ No newline at end of file
+                raise
@@ -0,0 +1,256 @@
+import asyncio
+import calendar
+import hashlib
+import io
+import os
+import random
+from typing import Any
+from google.genai import errors, types
+from .template_store import template_store, RESOLUTION_SCALE
+from .telemetry import telemetry
+from .clients import get_client, IMAGE_HTTP_OPTIONS, RETRY_OPTIONS
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MODEL = "gemini-3-pro-image-preview"
+
+
+class ModelBackend:
+    """
+    The model calls made by Daedalus tools.
+
+    Swapping the backend (see `set_backend`) lets the whole pipeline run
+    offline, e.g. against `FakeBackend` for load tests.
+    """
+
+    name = "base"
+
+    async def generate_image(self, prompt_contents: list, aspect_ratio: str, resolution: str, seed: int = None) -> tuple:
+        """
+        Renders one image.
+
+        Returns:
+            tuple: (image bytes, mime type).
+        """
+        raise NotImplementedError
+
+    async def generate_prompts(self, theme: str, tool_context) -> Any:
+        """Runs the prompt generator for a theme and returns its raw output."""
+        raise NotImplementedError
+
+    async def repair_prompts(self, theme: str, months: list, existing: dict, tool_context) -> Any:
+        """
+        Asks for prompts for the given months only.
+
+        Args:
+            theme: The calendar theme.
+            months: Month numbers that still need a prompt.
+            existing: The valid prompts already generated, {month: prompt}.
+
+        Returns:
+            The raw output of the prompt repairer.
+        """
+        raise NotImplementedError
+
+
+class GeminiBackend(ModelBackend):
+    """The real backend: Gemini 3 Pro Image and the prompt_generator sub-agent."""
+
+    name = "gemini"
+
+    async def generate_image(self, prompt_contents: list, aspect_ratio: str, resolution: str, seed: int = None) -> tuple:
+        response = await get_client().aio.models.generate_content(
+            model=IMAGE_MODEL,
+            contents=prompt_contents,
+            config=types.GenerateContentConfig(
+                response_modalities=['IMAGE'],
+                image_config=types.ImageConfig(
+                    aspect_ratio=aspect_ratio,
+                    image_size=resolution
+                ),
+                seed=seed,
+                http_options=IMAGE_HTTP_OPTIONS,
+            )
+        )
+        for part in response.parts or []:
+            if part.text is not None:
+                logger.info(f"Image model text: {part.text}")
+            elif part.inline_data is not None and part.inline_data.data:
+                return part.inline_data.data, part.inline_data.mime_type or "image/png"
+        raise ValueError("Image model returned no image")
+
+    async def generate_prompts(self, theme: str, tool_context) -> Any:
+        from .sub_agents import prompt_generator
+
+        return await self._run_agent_tool(prompt_generator, theme, tool_context)
+
+    async def repair_prompts(self, theme: str, months: list, existing: dict, tool_context) -> Any:
+        from .sub_agents import prompt_repairer
+
+        request = "\n".join(
+            [f"Theme: {theme}", f"Months that need a prompt: {months}", "Prompts for the other months:"]
+            + [f"{month}: {prompt}" for month, prompt in sorted(existing.items())]
+        )
+        return await self._run_agent_tool(prompt_repairer, request, tool_context)
+
+    async def _run_agent_tool(self, agent, request: str, tool_context) -> Any:
+        from google.adk.tools import AgentTool
+
+        agent_tool = AgentTool(agent=agent)
+        async with telemetry.span(f"agent_tool.{agent.name}"):
+            return await agent_tool.run_async(
+                args={"request": request},
+                tool_context=tool_context,
+            )
+
+
+class FakeBackend(ModelBackend):
+    """
+    In-process stand-in for the Gemini APIs.
+
+    Latencies are log-normal around the given medians (image latency scales
+    with resolution). Failures are injected at the given rates as the same
+    error types the real SDK raises, so retries, 429 handling and timeouts
+    behave as they would in production. Prompt calls retry 429/5xx errors
+    themselves, as the SDK does for the agents' own calls (`RETRY_OPTIONS`).
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        image_latency: float = 8.0,
+        prompt_latency: float = 3.0,
+        latency_sigma: float = 0.4,
+        rate_429: float = 0.0,
+        rate_500: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 60.0,
+        retry_after: float = 1.0,
+        prompt_defect_rate: float = 0.0,
+        seed: int = None,
+    ):
+        self.image_latency = image_latency
+        self.prompt_latency = prompt_latency
+        self.latency_sigma = latency_sigma
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.retry_after = retry_after
+        self.prompt_defect_rate = prompt_defect_rate
+        self._random = random.Random(seed)
+        self._images: dict = {}
+        self.image_calls = 0
+        self.prompt_calls = 0
+        self.repair_calls = 0
+
+    @classmethod
+    def from_env(cls):
+        """Builds a fake backend from DAEDALUS_FAKE_* environment variables."""
+        return cls(
+            image_latency=float(os.environ.get("DAEDALUS_FAKE_IMAGE_LATENCY", "8.0")),
+            prompt_latency=float(os.environ.get("DAEDALUS_FAKE_PROMPT_LATENCY", "3.0")),
+            latency_sigma=float(os.environ.get("DAEDALUS_FAKE_LATENCY_SIGMA", "0.4")),
+            rate_429=float(os.environ.get("DAEDALUS_FAKE_429_RATE", "0.0")),
+            rate_500=float(os.environ.get("DAEDALUS_FAKE_500_RATE", "0.0")),
+            timeout_rate=float(os.environ.get("DAEDALUS_FAKE_TIMEOUT_RATE", "0.0")),
+            prompt_defect_rate=float(os.environ.get("DAEDALUS_FAKE_PROMPT_DEFECT_RATE", "0.0")),
+        )
+
+    def _latency(self, median: float) -> float:
+        return median * self._random.lognormvariate(0.0, self.latency_sigma)
+
+    async def _maybe_fail(self, timeouts: bool = True):
+        roll = self._random.random()
+        if roll < self.rate_429:
+            await asyncio.sleep(self._latency(0.2))
+            raise errors.ClientError(
+                429,
+                {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "message": "Fake quota exceeded",
+                           "details": [{"retryDelay": f"{self.retry_after}s"}]}},
+            )
+        roll -= self.rate_429
+        if roll < self.rate_500:
+            await asyncio.sleep(self._latency(1.0))
+            raise errors.ServerError(500, {"error": {"code": 500, "status": "INTERNAL", "message": "Fake server error"}})
+        roll -= self.rate_500
+        if timeouts and roll < self.timeout_rate:
+            await asyncio.sleep(self.timeout_seconds)
+            raise TimeoutError("Fake request timed out")
+
+    async def _maybe_fail_retried(self):
+        # The prompt agents' calls have no client-side timeout, so only errors are injected
+        for attempt in range(1, RETRY_OPTIONS.attempts + 1):
+            try:
+                return await self._maybe_fail(timeouts=False)
+            except errors.APIError as e:
+                if attempt == RETRY_OPTIONS.attempts or e.code not in RETRY_OPTIONS.http_status_codes:
+                    raise
+                # Shorter than the SDK's backoff, like the fake's latencies
+                await asyncio.sleep(self.retry_after * attempt)
+
+    def _synthetic_image(self, prompt: str, aspect_ratio: str, resolution: str) -> bytes:
+        from PIL import Image
+
+        width, height = template_store.validate(aspect_ratio)
+        scale = RESOLUTION_SCALE.get(resolution, 1)
+        color = tuple(hashlib.sha256(prompt.encode("utf-8")).digest()[:3])
+        key = (width * scale, height * scale, color)
+        if key not in self._images:
+            buffer = io.BytesIO()
+            Image.new("RGB", key[:2], color).save(buffer, format="PNG")
+            self._images[key] = buffer.getvalue()
+        return self._images[key]
+
+    async def generate_image(self, prompt_contents: list, aspect_ratio: str, resolution: str, seed: int = None) -> tuple:
+        self.image_calls += 1
+        await self._maybe_fail()
+        await asyncio.sleep(self._latency(self.image_latency) * RESOLUTION_SCALE.get(resolution, 1) ** 0.5)
+        prompt = next((c for c in prompt_contents if isinstance(c, str)), "")
+        data = await asyncio.to_thread(self._synthetic_image, f"{prompt}|{seed}", aspect_ratio, resolution)
+        return data, "image/png"
+
+    async def generate_prompts(self, theme: str, tool_context) -> Any:
+        self.prompt_calls += 1
+        await self._maybe_fail_retried()
+        await asyncio.sleep(self._latency(self.prompt_latency))
+        entries = [{"month": month, "prompt": self._prompt(theme, month)} for month in range(1, 13)]
+        # Per entry, like a model dropping or mangling single items
+        entries = [
+            entry for entry in entries
+            if self._random.random() >= self.prompt_defect_rate
+        ]
+        # Same shape as the real sub-agent's structured output
+        return {"prompts": entries}
+
+    async def repair_prompts(self, theme: str, months: list, existing: dict, tool_context) -> Any:
+        self.repair_calls += 1
+        await self._maybe_fail_retried()
+        await asyncio.sleep(self._latency(self.prompt_latency) * len(months) / 12)
+        return {"prompts": [{"month": month, "prompt": self._prompt(theme, month)} for month in months]}
+
+    @staticmethod
+    def _prompt(theme: str, month: int) -> str:
+        month_name = calendar.month_name[month]
+        return f"Edit this image: change the background to a {theme} scene for {month_name}, keep all dates and text as is."
+
+
+_backend: ModelBackend = None
+
+
+def get_backend() -> ModelBackend:
+    """Returns the process-wide model backend, chosen by DAEDALUS_BACKEND ("gemini" or "fake")."""
+    global _backend
+    if _backend is None:
+        kind = os.environ.get("DAEDALUS_BACKEND", "gemini")
+        _backend = FakeBackend.from_env() if kind == "fake" else GeminiBackend()
+        logger.info(f"Using {_backend.name} model backend")
+    return _backend
+
+
+def set_backend(backend: ModelBackend):
+    """Replaces the process-wide model backend (e.g. with a `FakeBackend`)."""
+    global _backend
+    _backend = backend
@@ -0,0 +1,236 @@
+"""
+Offline load benchmark for the Daedalus pipeline.
+
+Simulates N concurrent customer sessions (generate_prompts followed by
+generate_calendar, optionally with Iris' get_infographic) against the
+in-process FakeBackend and reports latency percentiles, time-to-first-image,
+throughput and peak RSS. No API quota is used.
+
+    python -m daedalus.src.benchmark --sessions 20 --image-latency 2 --rate-429 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from .backend import FakeBackend, set_backend
+from .result_cache import image_cache
+from .prompt_cache import prompt_cache
+from .scheduler import image_scheduler, AdaptiveTokenBucket
+from .telemetry import telemetry
+from .resilience import image_latency, image_hedge_budget, image_circuit
+from . import agent_tools
+
+THEMES = ["Diwali", "Star Wars", "minimal pastel", "monsoon", "cricket", "vintage botanical", "cyberpunk city", "beach"]
+
+
+class BenchToolContext:
+    """Just enough of ADK's ToolContext for the Daedalus tools."""
+
+    def __init__(self, user_id: str, invocation_id: str):
+        self.user_id = user_id
+        self.invocation_id = invocation_id
+        self.state = {}
+        self.artifact_bytes = 0
+
+    async def save_artifact(self, filename: str, artifact) -> int:
+        # Keep only sizes, so the benchmark's own memory does not skew peak RSS
+        self.artifact_bytes += len(artifact.inline_data.data)
+        return 0
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(values: list) -> dict:
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+async def run_session(index: int, args, results: dict):
+    await asyncio.sleep(args.ramp * index / max(1, args.sessions))
+    ctx = BenchToolContext(user_id=f"bench-user-{index}", invocation_id=f"bench-order-{index}")
+    started = time.perf_counter()
+
+    if args.infographics:
+        from iris.src.agent_tools import get_infographic
+
+        t0 = time.perf_counter()
+        await get_infographic("product_tiers", ctx)
+        results["infographic"].append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    try:
+        await agent_tools.generate_prompts(THEMES[index % args.themes], ctx)
+    except Exception:
+        # The fake, like the SDK, has already retried transient errors; count the order as lost
+        results["failed_orders"] += 1
+        return
+    results["prompts"].append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    message = ""
+    first_image_at = None
+    # Like the Runner, consume the events the tool yields; a month reaches the user with its event
+    async for item in agent_tools.generate_calendar(args.aspect_ratio, args.resolution, ctx, tier=args.tier):
+        if isinstance(item, str):
+            message = item
+        elif first_image_at is None and item.actions.artifact_delta:
+            first_image_at = time.perf_counter()
+    finished = time.perf_counter()
+    results["calendar"].append(finished - t0)
+    results["order"].append(finished - started)
+    if first_image_at is not None:
+        results["first_image"].append(first_image_at - t0)
+    if "error" in message.lower():
+        results["failed_orders"] += 1
+    results["images"] += len(ctx.state.get("user:calendar_progress", {}).get("completed", []))
+    results["artifact_bytes"] += ctx.artifact_bytes
+
+
+async def run_benchmark(args) -> dict:
+    backend = FakeBackend(
+        image_latency=args.image_latency,
+        prompt_latency=args.prompt_latency,
+        latency_sigma=args.latency_sigma,
+        rate_429=args.rate_429,
+        rate_500=args.rate_500,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        prompt_defect_rate=args.prompt_defect_rate,
+        seed=args.seed,
+    )
+    set_backend(backend)
+    if args.concurrency:
+        image_scheduler.max_concurrency = args.concurrency
+    if args.rps:
+        image_scheduler.bucket = AdaptiveTokenBucket(args.rps, args.burst or max(1, int(args.rps)))
+
+    results = {
+        "infographic": [], "prompts": [], "calendar": [], "order": [], "first_image": [],
+        "failed_orders": 0, "images": 0, "artifact_bytes": 0,
+    }
+    started = time.perf_counter()
+    await asyncio.gather(*(run_session(i, args, results) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "sessions": args.sessions,
+        "elapsed_seconds": round(elapsed, 3),
+        "failed_orders": results["failed_orders"],
+        "images": results["images"],
+        "throughput_images_per_second": round(results["images"] / elapsed, 3),
+        "throughput_orders_per_minute": round(60 * (args.sessions - results["failed_orders"]) / elapsed, 3),
+        "order_latency": summarize(results["order"]),
+        "calendar_latency": summarize(results["calendar"]),
+        "time_to_first_image": summarize(results["first_image"]),
+        "prompt_latency": summarize(results["prompts"]),
+        "infographic_latency": summarize(results["infographic"]),
+        "artifact_megabytes": round(results["artifact_bytes"] / 1e6, 2),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_megabytes": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "backend_calls": {"image": backend.image_calls, "prompts": backend.prompt_calls, "prompt_repairs": backend.repair_calls},
+        "scheduler": image_scheduler.stats(),
+        "image_cache": image_cache.stats(),
+        "prompt_cache": prompt_cache.stats(),
+        "resilience": {
+            "latency": image_latency.stats(),
+            "hedging": image_hedge_budget.stats(),
+            "circuit": image_circuit.stats(),
+        },
+        "spans": span_summary(),
+    }
+
+
+def span_summary() -> dict:
+    """Per-stage span counts and latency percentiles from the telemetry histograms."""
+    spans = {}
+    for histogram in telemetry.snapshot()["histograms"]:
+        if histogram["name"] != "daedalus_span_seconds":
+            continue
+        labels = histogram["labels"]
+        spans[f"{labels['span']} ({labels['outcome']})"] = {
+            key: histogram[key] for key in ("count", "sum", "p50", "p95", "p99")
+        }
+    return dict(sorted(spans.items()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load benchmark for Daedalus.")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent customer sessions.")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which sessions arrive.")
+    parser.add_argument("--themes", type=int, default=len(THEMES), help="Distinct themes (fewer = more cache hits).")
+    parser.add_argument("--aspect-ratio", default="9:16")
+    parser.add_argument("--resolution", default="1K")
+    parser.add_argument("--tier", default="Value")
+    parser.add_argument("--infographics", action="store_true", help="Also call Iris' get_infographic per session.")
+    parser.add_argument("--image-latency", type=float, default=8.0, help="Median fake image latency at 1K (s).")
+    parser.add_argument("--prompt-latency", type=float, default=3.0, help="Median fake prompt latency (s).")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="Log-normal spread of latencies.")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-500", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-seconds", type=float, default=60.0)
+    parser.add_argument("--prompt-defect-rate", type=float, default=0.0, help="Fraction of prompt entries the fake drops.")
+    parser.add_argument("--concurrency", type=int, default=0, help="Override the image scheduler concurrency.")
+    parser.add_argument("--rps", type=float, default=0.0, help="Override the image scheduler rate.")
+    parser.add_argument("--burst", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--keep", action="store_true", help="Keep the output folder instead of deleting it.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Outputs and cache go to a scratch folder so runs never touch real orders
+    workdir = Path(tempfile.mkdtemp(prefix="daedalus-bench-"))
+    image_cache.cache_dir = workdir / "cache"
+    prompt_cache.path = workdir / "cache" / "prompts.json"
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        report = asyncio.run(run_benchmark(args))
+    finally:
+        os.chdir(previous_cwd)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"Sessions: {report['sessions']}  elapsed: {report['elapsed_seconds']}s  failed orders: {report['failed_orders']}")
+    print(f"Throughput: {report['throughput_images_per_second']} images/s, {report['throughput_orders_per_minute']} orders/min")
+    for name in ("order_latency", "calendar_latency", "time_to_first_image", "prompt_latency", "infographic_latency"):
+        stats = report[name]
+        if stats["count"]:
+            print(f"{name:>22}: p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  p99 {stats['p99']:.2f}s  max {stats['max']:.2f}s")
+    print(f"Peak RSS: {report['peak_rss_megabytes']} MB  artifacts: {report['artifact_megabytes']} MB")
+    print(f"Backend calls: {report['backend_calls']}")
+    print(f"Scheduler: {report['scheduler']}")
+    print(f"Image cache: {report['image_cache']}")
+    print(f"Prompt cache: {report['prompt_cache']}")
+    print(f"Resilience: {report['resilience']}")
+    print("Spans (bucketed p50/p95 upper bounds):")
+    for name, stats in report["spans"].items():
+        print(f"{name:>40}: n {stats['count']:<5} total {stats['sum']:.2f}s  p50 <={stats['p50']}s  p95 <={stats['p95']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import AsyncGenerator, List, Union
+from google.genai import types
+from google.adk.events.event import Event
+from google.adk.tools.tool_context import ToolContext
+from .agent_tools import build_prompt_set, generate_images_gemini_3_pro
+from .jobs import OUTPUT_DIR, MANIFEST_NAME, PENDING, DONE, FAILED, link_or_copy
+from .prompts import validate_prompts, PROMPT_COUNT
+from .scheduler import bulk_priority, MAX_CONCURRENCY
+from .template_store import template_store, RESOLUTION_SCALE
+from .workers import worker_pool, output_extension, write_bytes
+from .telemetry import telemetry
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Renders in flight per bulk order. The image scheduler still decides how many
+# reach the model (bulk orders only get capacity interactive orders leave
+# unused); this only bounds the tasks (and memory) a large order holds.
+BULK_WORKERS = int(os.environ.get("DAEDALUS_BULK_WORKERS", str(2 * MAX_CONCURRENCY)))
+MAX_VARIANTS = int(os.environ.get("DAEDALUS_BULK_MAX_VARIANTS", "1000"))
+# How often the manifest is checkpointed and progress published while rendering
+PROGRESS_INTERVAL = float(os.environ.get("DAEDALUS_BULK_PROGRESS_SECONDS", "2"))
+
+# Bulk jobs currently rendering in this process, for /metrics.json
+_active_jobs = {}
+
+
+def normalize_variant(variant: str) -> str:
+    """Collapses whitespace, so "Jane  Doe " and "Jane Doe" render once."""
+    return " ".join(str(variant).split())
+
+
+def variant_prompt(prompt: str, variant: str) -> str:
+    """
+    Personalizes a base month prompt with a variant, e.g. an employee name or a company logo text.
+
+    An empty variant keeps the base prompt, i.e. the plain calendar.
+    """
+    if not variant:
+        return prompt
+    return (
+        f"{prompt.rstrip().rstrip('.')}. Personalize the design with \"{variant}\", "
+        "added as a small, legible detail that fits the scene. Do not change the dates or month names."
+    )
+
+
+def variant_folder(index: int, variant: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", variant.lower()).strip("-")[:40]
+    return f"{index + 1:04d}-{slug or 'base'}"
+
+
+def bulk_job_id(user_id: str, prompts: list, variants: list, aspect_ratio: str, resolution: str) -> str:
+    """Returns a deterministic id for a bulk order, so re-running it resumes the same job."""
+    payload = json.dumps(
+        {
+            "user": user_id,
+            "prompts": list(prompts),
+            "variants": list(variants),
+            "aspect_ratio": aspect_ratio,
+            "resolution": resolution,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _render_key(month: int, prompt: str) -> str:
+    return hashlib.sha256(f"{month}\n{prompt}".encode("utf-8")).hexdigest()[:16]
+
+
+class BulkJob:
+    """
+    A multi-calendar order persisted as `bulk_<job_id>/manifest.json`.
+
+    Every variant is a full calendar. Month images whose personalized prompt
+    is identical across variants are rendered once into `renders/` and
+    hard-linked into each variant's folder.
+
+    Unlike `CalendarJob`, finished renders are not saved one by one: with
+    thousands of renders the manifest is checkpointed with `save` instead.
+    A render lost between checkpoints is served from the image cache when
+    the order is resumed.
+
+    Methods do blocking file I/O; async callers should run them on the worker pool.
+    """
+
+    def __init__(self, folder: Path, manifest: dict):
+        self.folder = folder
+        self.manifest = manifest
+        self._lock = threading.RLock()
+
+    @property
+    def job_id(self) -> str:
+        return self.manifest["job_id"]
+
+    @classmethod
+    def open(
+        cls,
+        user_id: str,
+        theme: str,
+        prompts: list,
+        variants: list,
+        aspect_ratio: str,
+        resolution: str,
+        output_dir: Path = OUTPUT_DIR,
+    ):
+        """
+        Loads the job for a bulk order, creating its folder and manifest if needed.
+
+        Args:
+            prompts: The 12 base month prompts.
+            variants: Normalized variants, one per calendar; "" stands for the plain calendar.
+        """
+        job_id = bulk_job_id(user_id, prompts, variants, aspect_ratio, resolution)
+        folder = Path(output_dir) / f"bulk_{job_id}"
+        manifest_path = folder / MANIFEST_NAME
+        if manifest_path.exists():
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                logger.info(f"Resuming bulk job {job_id}")
+                return cls(folder, json.load(f))
+
+        renders = {}
+        variant_entries = []
+        for index, variant in enumerate(variants):
+            months = {}
+            for month, prompt in enumerate(prompts, start=1):
+                prompt = variant_prompt(prompt, variant)
+                key = _render_key(month, prompt)
+                renders.setdefault(
+                    key,
+                    {"month": month, "prompt": prompt, "status": PENDING, "output": None, "error": None, "attempts": 0},
+                )
+                months[str(month)] = key
+            variant_entries.append({"variant": variant, "folder": variant_folder(index, variant), "months": months})
+
+        now = time.time()
+        manifest = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "theme": theme,
+            "aspect_ratio": aspect_ratio,
+            "resolution": resolution,
+            "created_at": now,
+            "updated_at": now,
+            "prompts": list(prompts),
+            "variants": variant_entries,
+            "renders": renders,
+        }
+        (folder / "renders").mkdir(parents=True, exist_ok=True)
+        job = cls(folder, manifest)
+        job.save()
+        logger.info(f"Created bulk job {job_id}: {len(variants)} variants, {len(renders)} unique renders")
+        return job
+
+    def render(self, key: str) -> dict:
+        return self.manifest["renders"][key]
+
+    def render_path(self, key: str) -> Path:
+        # The extension is replaced to match the encoded output format
+        return self.folder / "renders" / f"{key}.png"
+
+    def pending_renders(self) -> list:
+        """Returns the render keys that still need rendering, in variant order so whole calendars finish early."""
+        return [
+            key for key, entry in self.manifest["renders"].items()
+            if entry["status"] != DONE or not (self.folder / entry["output"]).exists()
+        ]
+
+    def mark_done(self, key: str, output_path: Path):
+        with self._lock:
+            self.render(key).update(
+                status=DONE,
+                output=str(output_path.relative_to(self.folder)),
+                error=None,
+                attempts=self.render(key)["attempts"] + 1,
+            )
+
+    def mark_failed(self, key: str, error: Exception):
+        with self._lock:
+            entry = self.render(key)
+            entry.update(status=FAILED, error=str(error), attempts=entry["attempts"] + 1)
+
+    def link_variants(self):
+        """
+        Links every finished render into the folders of the variants that use it.
+
+        Incomplete variants are recorded in the manifest as `{variant folder: [missing months]}`.
+        """
+        incomplete = {}
+        with self._lock:
+            for entry in self.manifest["variants"]:
+                folder = self.folder / entry["folder"]
+                for month, key in entry["months"].items():
+                    render = self.render(key)
+                    if render["status"] != DONE:
+                        incomplete.setdefault(entry["folder"], []).append(int(month))
+                        continue
+                    source = self.folder / render["output"]
+                    target = folder / f"{month}-2026{source.suffix}"
+                    if not target.exists():
+                        link_or_copy(source, target)
+            self.manifest["incomplete"] = incomplete
+
+    def summary(self) -> dict:
+        with self._lock:
+            renders = self.manifest["renders"].values()
+            images = len(self.manifest["variants"]) * PROMPT_COUNT
+            return {
+                "job_id": self.job_id,
+                "output_folder": str(self.folder),
+                "variants": len(self.manifest["variants"]),
+                "images": images,
+                "unique_renders": len(self.manifest["renders"]),
+                "deduplicated": images - len(self.manifest["renders"]),
+                "done": sum(1 for r in renders if r["status"] == DONE),
+                "failed": sum(1 for r in renders if r["status"] == FAILED),
+            }
+
+    def save(self):
+        """Atomically rewrites the manifest."""
+        with self._lock:
+            self.manifest["updated_at"] = time.time()
+            payload = json.dumps(self.manifest, indent=2)
+        write_bytes(self.folder / MANIFEST_NAME, payload.encode("utf-8"))
+
+
+async def run_bulk_job(job: BulkJob, templates: list, order_id: str, priority: int, on_progress=None, workers: int = BULK_WORKERS):
+    """
+    Renders the pending renders of a bulk job with a fixed number of workers.
+
+    Each image goes to disk as soon as it is rendered and is not kept in
+    memory. The manifest is checkpointed, and `on_progress(summary)` called,
+    at most every `PROGRESS_INTERVAL` seconds and once at the end.
+
+    Returns:
+        dict: The job summary (see `BulkJob.summary`).
+    """
+    pending = await worker_pool.run_io(job.pending_renders)
+    aspect_ratio = job.manifest["aspect_ratio"]
+    resolution = job.manifest["resolution"]
+    logger.info(f"Bulk job {job.job_id}: rendering {len(pending)} of {len(job.manifest['renders'])} unique images")
+
+    last_checkpoint = time.monotonic()
+    checkpointing = None
+
+    async def checkpoint():
+        await worker_pool.run_io(job.save)
+        if on_progress is not None:
+            on_progress(job.summary())
+
+    def maybe_checkpoint():
+        nonlocal last_checkpoint, checkpointing
+        now = time.monotonic()
+        if now - last_checkpoint >= PROGRESS_INTERVAL and (checkpointing is None or checkpointing.done()):
+            last_checkpoint = now
+            checkpointing = asyncio.create_task(checkpoint())
+
+    # Workers share one iterator, so at most `workers` renders are ever in flight
+    queue = iter(pending)
+
+    async def worker():
+        for key in queue:
+            entry = job.render(key)
+            try:
+                async with telemetry.span("bulk.render", job_id=job.job_id, month=entry["month"]):
+                    _, mime_type = await generate_images_gemini_3_pro(
+                        prompt=entry["prompt"],
+                        template=templates[entry["month"] - 1],
+                        aspect_ratio=aspect_ratio,
+                        resolution=resolution,
+                        output_path=str(job.render_path(key)),
+                        order_id=order_id,
+                        priority=priority,
+                    )
+                job.mark_done(key, job.render_path(key).with_suffix(output_extension(mime_type)))
+                telemetry.incr("daedalus_bulk_renders_total", outcome="ok")
+            except Exception as e:
+                logger.error(f"Bulk job {job.job_id}: month {entry['month']} render {key} failed: {e}")
+                job.mark_failed(key, e)
+                telemetry.incr("daedalus_bulk_renders_total", outcome="error")
+            maybe_checkpoint()
+
+    _active_jobs[job.job_id] = job
+    try:
+        async with telemetry.span("bulk.job", job_id=job.job_id, renders=len(pending)):
+            await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(pending))))))
+            if checkpointing is not None:
+                await checkpointing
+            await worker_pool.run_io(job.link_variants)
+            await checkpoint()
+    finally:
+        _active_jobs.pop(job.job_id, None)
+    return job.summary()
+
+
+def bulk_stats() -> dict:
+    stats = {"active_jobs": len(_active_jobs)}
+    for job in list(_active_jobs.values()):
+        summary = job.summary()
+        stats[f"{job.job_id}_done"] = summary["done"]
+        stats[f"{job.job_id}_failed"] = summary["failed"]
+        stats[f"{job.job_id}_unique_renders"] = summary["unique_renders"]
+    return stats
+
+
+telemetry.register_stats("bulk", bulk_stats)
+
+
+async def generate_bulk_order(
+    theme: str,
+    variants: List[str],
+    aspect_ratio: str,
+    resolution: str,
+    tool_context: ToolContext,
+    tier: str = "Value",
+    use_current_prompts: bool = False,
+) -> AsyncGenerator[Union[Event, str], None]:
+    """
+    Generates one personalized calendar per variant for a bulk order, e.g. an employer gifting calendars to employees.
+
+    All calendars share the theme's 12 prompts, personalized with their variant.
+    Identical calendars are rendered once. Every progress checkpoint is yielded
+    as an event carrying the `user:bulk_progress` state, so the user sees the
+    order advance; the final manifest is delivered as an artifact.
+
+    Args:
+        theme (str): The base theme shared by all calendars.
+        variants (List[str]): One entry per calendar, e.g. employee names or "Acme Corp" for a
+            company logo text. An empty string is a calendar without personalization.
+        aspect_ratio (str): The aspect ratio of the calendar images (e.g., "9:16").
+        resolution (str): The resolution of the calendar images (e.g., "1K").
+        tool_context (ToolContext): The tool context to access state.
+        tier (str): The product tier purchased by the user (e.g., "Premium"), used to prioritise the order
+            among other bulk orders. Bulk orders always yield to interactive ones.
+        use_current_prompts (bool): Use the prompts already generated (and previewed) in this session
+            instead of the theme's prompts.
+
+    Yields:
+        Event: One per progress checkpoint, carrying the progress state.
+        str: Finally, a message indicating the result of the bulk order.
+    """
+    resolution = resolution.strip().upper()
+    if resolution not in RESOLUTION_SCALE:
+        yield f"Error: Unsupported resolution: {resolution}. Supported: {', '.join(RESOLUTION_SCALE)}"
+        return
+
+    # Every variant is its own calendar; identical ones (e.g. two employees with the same name) share renders
+    variants = [normalize_variant(v) for v in variants or []]
+    if not variants:
+        yield "Error: Provide at least one variant (use an empty string for a calendar without personalization)."
+        return
+    if len(variants) > MAX_VARIANTS:
+        yield f"Error: A bulk order can have at most {MAX_VARIANTS} calendars, got {len(variants)}."
+        return
+
+    if use_current_prompts:
+        prompts = tool_context.state.get("user:prompts", [])
+    else:
+        # The bulk theme's prompts must not replace the ones the user is previewing
+        prompts = await build_prompt_set(theme, tool_context)
+    if not validate_prompts(prompts):
+        logger.error(f"Invalid prompts for bulk order: {len(prompts) if prompts else 0}")
+        yield "Error: Could not get exactly 12 valid prompts for the theme. Please generate prompts first."
+        return
+
+    try:
+        templates = await template_store.get_payloads(aspect_ratio, resolution)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Template loading failed: {e}")
+        yield f"Error: {e}. Please check aspect ratio, resolution and template files."
+        return
+
+    job = await worker_pool.run_io(
+        BulkJob.open, tool_context.user_id, theme, prompts, variants, aspect_ratio, resolution
+    )
+    tool_context.state["user:bulk_job"] = job.job_id
+
+    updated = asyncio.Event()
+
+    def publish(summary: dict):
+        # State deltas are only recorded on assignment, so always store a fresh copy
+        tool_context.state["user:bulk_progress"] = dict(summary)
+        logger.info(f"Bulk job {job.job_id}: {summary['done']}/{summary['unique_renders']} renders done, {summary['failed']} failed")
+        updated.set()
+
+    publish(job.summary())
+    # The state delta only reaches the session with an event the tool yields
+    run = asyncio.ensure_future(
+        run_bulk_job(job, templates, f"bulk-{job.job_id}", bulk_priority(tier), on_progress=publish)
+    )
+    try:
+        while True:
+            if updated.is_set():
+                updated.clear()
+                yield Event()
+            if run.done():
+                break
+            waiter = asyncio.ensure_future(updated.wait())
+            await asyncio.wait({run, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+        summary = run.result()
+    finally:
+        # The caller stopped listening (e.g. the run was cancelled); stop rendering
+        run.cancel()
+
+    manifest = await worker_pool.run_io(lambda: (job.folder / MANIFEST_NAME).read_bytes())
+    await tool_context.save_artifact(
+        filename=f"bulk-{job.job_id}-manifest.json",
+        artifact=types.Part.from_bytes(data=manifest, mime_type="application/json"),
+    )
+
+    message = (
+        f"Bulk order {job.job_id}: {summary['variants']} calendars ({summary['images']} images, "
+        f"{summary['unique_renders']} unique renders after removing {summary['deduplicated']} duplicates) "
+        f"in folder: {summary['output_folder']}."
+    )
+    if summary["failed"]:
+        yield (
+            message + f"\n{summary['failed']} renders failed, so some calendars are incomplete (see the manifest)."
+            + "\nCall generate_bulk_order again with the same arguments to retry only the failed renders."
+        )
+    else:
+        yield message + " All calendars are complete. The manifest was delivered as an artifact."
@@ -0,0 +1,89 @@
+import asyncio
+import importlib.util
+import os
+import threading
+import weakref
+from google.genai import types
+from .resilience import MAX_TIMEOUT
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keep-alive pool shared by every agent, sub-agent and image call in a process
+MAX_CONNECTIONS = int(os.environ.get("DAEDALUS_HTTP_MAX_CONNECTIONS", "32"))
+KEEPALIVE_SECONDS = float(os.environ.get("DAEDALUS_HTTP_KEEPALIVE", "60"))
+# HTTP/2 multiplexes concurrent requests over one TLS connection; needs the h2 package
+HTTP2_ENABLED = os.environ.get("DAEDALUS_HTTP2", "1") != "0" and importlib.util.find_spec("h2") is not None
+
+# Retries for the agents' own LLM calls
+RETRY_OPTIONS = types.HttpRetryOptions(
+    attempts=5,  # Maximum retry attempts
+    exp_base=7,  # Delay multiplier
+    initial_delay=1, # Initial delay before first retry (in seconds)
+    http_status_codes=[429, 500, 503, 504] # Retry on these HTTP errors
+)
+
+# Image calls are retried by the image scheduler, which also honours Retry-After,
+# so the SDK makes a single attempt. Their timeout is the adaptive one from
+# resilience.py; the SDK's only backs it up, so it must not fire first.
+IMAGE_HTTP_OPTIONS = types.HttpOptions(
+    timeout=int((MAX_TIMEOUT + 10) * 1000),
+    retry_options=types.HttpRetryOptions(attempts=1),
+)
+
+_clients = weakref.WeakKeyDictionary()
+_sync_client = None
+_lock = threading.Lock()
+
+
+def _pool_args() -> dict:
+    import httpx
+
+    return {
+        "http2": HTTP2_ENABLED,
+        "limits": httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_SECONDS,
+        ),
+    }
+
+
+def _build_client():
+    from google import genai
+
+    # Credentials (GOOGLE_API_KEY, or Vertex AI settings) are read here, on first use,
+    # so the packages import without them
+    client = genai.Client(
+        http_options=types.HttpOptions(
+            retry_options=RETRY_OPTIONS,
+            client_args=_pool_args(),
+            async_client_args=_pool_args(),
+        )
+    )
+    logger.info(f"Created shared genai client (HTTP/2 {'on' if HTTP2_ENABLED else 'off'}, {MAX_CONNECTIONS} connections)")
+    return client
+
+
+def get_client():
+    """
+    Returns the process-wide `genai.Client`, building it on first use.
+
+    The async connection pool belongs to an event loop, so each running loop
+    gets its own client; within a loop every caller shares one.
+    """
+    global _sync_client
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _lock:
+        if loop is None:
+            if _sync_client is None:
+                _sync_client = _build_client()
+            return _sync_client
+        client = _clients.get(loop)
+        if client is None:
+            client = _clients[loop] = _build_client()
+        return client
@@ -0,0 +1,273 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import weakref
+from pathlib import Path
+from .workers import output_extension, write_bytes
+import logging
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = Path(os.environ.get("DAEDALUS_OUTPUT_DIR", "."))
+MANIFEST_NAME = "manifest.json"
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+# The live job object of each job folder in this process, so concurrent runs of
+# one order share a manifest (and its lock) instead of overwriting each other's
+_live_jobs = weakref.WeakValueDictionary()
+_live_jobs_lock = threading.Lock()
+
+
+def calendar_job_id(user_id: str, prompts: list, aspect_ratio: str, resolution: str) -> str:
+    """
+    Returns a deterministic job id for a calendar order.
+
+    The same user asking for the same prompts, aspect ratio and resolution
+    always gets the same job, so re-running an order resumes it instead of
+    starting over in a new folder.
+    """
+    payload = json.dumps(
+        {"user": user_id, "prompts": list(prompts), "aspect_ratio": aspect_ratio, "resolution": resolution},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def link_or_copy(source: Path, target: Path):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+class CalendarJob:
+    """
+    A calendar order persisted as `output_<job_id>/manifest.json`.
+
+    The manifest records the status, prompt and output hash of every month,
+    and is rewritten atomically after each change so a crash never loses
+    months that were already paid for. Within a process there is one live
+    object per job, shared by every run of that order.
+
+    Methods do blocking file I/O; async callers should run them on the worker pool.
+    """
+
+    def __init__(self, folder: Path, manifest: dict):
+        self.folder = folder
+        self.manifest = manifest
+        # Months finish concurrently on worker threads
+        self._lock = threading.RLock()
+
+    @property
+    def job_id(self) -> str:
+        return self.manifest["job_id"]
+
+    @classmethod
+    def load(cls, job_id: str, output_dir: Path = OUTPUT_DIR):
+        """Loads an existing job by id, or returns None if it has no manifest."""
+        folder = Path(output_dir) / f"output_{job_id}"
+        with _live_jobs_lock:
+            return cls._load_locked(folder)
+
+    @classmethod
+    def _load_locked(cls, folder: Path):
+        key = str(folder.resolve())
+        job = _live_jobs.get(key)
+        if job is not None:
+            return job
+        manifest_path = folder / MANIFEST_NAME
+        if not manifest_path.exists():
+            return None
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            job = cls(folder, json.load(f))
+        _live_jobs[key] = job
+        return job
+
+    @classmethod
+    def open(
+        cls,
+        user_id: str,
+        prompts: list,
+        aspect_ratio: str,
+        resolution: str,
+        output_dir: Path = OUTPUT_DIR,
+        deliverables: list = None,
+    ):
+        """
+        Loads the job for an order, creating its folder and manifest if needed.
+
+        Args:
+            resolution: The resolution the model renders at.
+            deliverables: All resolutions to deliver, derived locally from the
+                rendered one. Defaults to just `resolution`.
+        """
+        deliverables = list(deliverables or [resolution])
+        job_id = calendar_job_id(user_id, prompts, aspect_ratio, ",".join(deliverables))
+        folder = Path(output_dir) / f"output_{job_id}"
+        with _live_jobs_lock:
+            job = cls._load_locked(folder)
+            if job is not None:
+                logger.info(f"Resuming calendar job {job_id}")
+                return job
+            job = cls._create(folder, job_id, user_id, prompts, aspect_ratio, resolution, deliverables)
+            _live_jobs[str(folder.resolve())] = job
+        logger.info(f"Created calendar job {job_id}")
+        return job
+
+    @classmethod
+    def _create(cls, folder: Path, job_id: str, user_id: str, prompts: list, aspect_ratio: str, resolution: str, deliverables: list):
+        now = time.time()
+        manifest = {
+            "job_id": job_id,
+            "user_id": user_id,
+            "aspect_ratio": aspect_ratio,
+            "resolution": resolution,
+            "deliverables": deliverables,
+            "created_at": now,
+            "updated_at": now,
+            "months": {
+                str(month): {
+                    "status": PENDING,
+                    "prompt": prompt,
+                    "output": None,
+                    "sha256": None,
+                    "error": None,
+                    "attempts": 0,
+                    "variant": 0,
+                    "derived": {},
+                    "preview": None,
+                }
+                for month, prompt in enumerate(prompts, start=1)
+            },
+        }
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(folder / "prompts.txt", "w", encoding="utf-8") as f:
+            for prompt in prompts:
+                f.write(prompt + "\n")
+        job = cls(folder, manifest)
+        job.save()
+        return job
+
+    def month(self, month: int) -> dict:
+        return self.manifest["months"][str(month)]
+
+    def pending_months(self) -> list:
+        """
+        Returns the months that still need rendering.
+
+        A month counts as done only if its output file still exists and
+        matches the recorded hash, and its derived files still exist.
+        """
+        pending = []
+        for key, entry in self.manifest["months"].items():
+            if entry["status"] == DONE and entry["output"]:
+                path = self.folder / entry["output"]
+                if (
+                    path.exists()
+                    and hashlib.sha256(path.read_bytes()).hexdigest() == entry["sha256"]
+                    and all((self.folder / name).exists() for name in self._derived_files(entry))
+                ):
+                    continue
+                logger.warning(f"Job {self.job_id}: output for month {key} is missing or changed")
+            pending.append(int(key))
+        return sorted(pending)
+
+    def done_months(self) -> list:
+        return sorted(int(key) for key, entry in self.manifest["months"].items() if entry["status"] == DONE)
+
+    def output_path(self, month: int, mime_type: str = "image/png") -> Path:
+        return self.folder / f"{month}-2026{output_extension(mime_type)}"
+
+    def derived_path(self, month: int, resolution: str, mime_type: str = "image/png") -> Path:
+        """Returns the path of a locally derived, smaller deliverable."""
+        return self.folder / resolution / f"{month}-2026{output_extension(mime_type)}"
+
+    def preview_path(self, month: int) -> Path:
+        return self.folder / "previews" / f"{month}-2026.jpg"
+
+    @staticmethod
+    def _derived_files(entry: dict) -> list:
+        files = list(entry.get("derived", {}).values())
+        if entry.get("preview"):
+            files.append(entry["preview"])
+        return files
+
+    def mark_done(self, month: int, image_bytes: bytes, mime_type: str = "image/png", derived: dict = None, preview: str = None):
+        """
+        Records a finished month.
+
+        Args:
+            derived: Mapping of resolution to derived file path, relative to the job folder.
+            preview: Preview file path, relative to the job folder.
+        """
+        with self._lock:
+            entry = self.month(month)
+            entry.update(
+                status=DONE,
+                output=self.output_path(month, mime_type).name,
+                sha256=hashlib.sha256(image_bytes).hexdigest(),
+                error=None,
+                attempts=entry["attempts"] + 1,
+                derived=dict(derived or {}),
+                preview=preview,
+            )
+            self.save()
+
+    def reset(self, month: int, new_variant: bool = False):
+        """Marks a month for re-rendering, optionally as a new variation of the same prompt."""
+        with self._lock:
+            entry = self.month(month)
+            entry.update(status=PENDING, error=None)
+            if new_variant:
+                entry["variant"] = entry.get("variant", 0) + 1
+            self.save()
+
+    def adopt(self, other: "CalendarJob"):
+        """
+        Copies finished months from another job of the same order whose prompt is unchanged.
+
+        Outputs are hard-linked where possible, so nothing is re-rendered or duplicated on disk.
+        """
+        adopted = []
+        with self._lock:
+            for month in self.pending_months():
+                entry, source = self.month(month), other.month(month)
+                if source["status"] != DONE or source["prompt"] != entry["prompt"]:
+                    continue
+                source_path = other.folder / source["output"]
+                if not source_path.exists():
+                    continue
+                for name in [source["output"]] + self._derived_files(source):
+                    if (other.folder / name).exists():
+                        link_or_copy(other.folder / name, self.folder / name)
+                entry.update(
+                    status=DONE,
+                    output=source["output"],
+                    sha256=source["sha256"],
+                    variant=source.get("variant", 0),
+                    derived=dict(source.get("derived", {})),
+                    preview=source.get("preview"),
+                )
+                adopted.append(month)
+            self.save()
+        logger.info(f"Job {self.job_id}: adopted months {adopted} from job {other.job_id}")
+
+    def mark_failed(self, month: int, error: Exception):
+        with self._lock:
+            entry = self.month(month)
+            entry.update(status=FAILED, error=str(error), attempts=entry["attempts"] + 1)
+            self.save()
+
+    def save(self):
+        """Atomically rewrites the manifest."""
+        with self._lock:
+            self.manifest["updated_at"] = time.time()
+            write_bytes(self.folder / MANIFEST_NAME, json.dumps(self.manifest, indent=2).encode("utf-8"))
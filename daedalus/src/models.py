@@ -0,0 +1,51 @@
+import time
+from typing import AsyncGenerator
+from google.adk.models.google_llm import Gemini
+from .telemetry import telemetry
+from .clients import get_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedGemini(Gemini):
+    """
+    ADK's Gemini model on the shared client, with a `model.<model name>` span per LLM call.
+
+    All agents and sub-agents use the process-wide client from `get_client`
+    (one keep-alive pool per event loop, retries per `clients.RETRY_OPTIONS`)
+    instead of building a client per model object.
+
+    Records the call latency, outcome, number of streamed chunks and token
+    usage, so agent turns show up next to the tool spans they trigger.
+    """
+
+    @property
+    def api_client(self):
+        # get_client is itself per event loop, so this never pins a closed loop's client
+        return self.client or get_client()
+
+    async def generate_content_async(self, llm_request, stream: bool = False) -> AsyncGenerator:
+        started = time.perf_counter()
+        outcome = "ok"
+        chunks = 0
+        usage = None
+        try:
+            async for response in super().generate_content_async(llm_request, stream=stream):
+                chunks += 1
+                if response.usage_metadata is not None:
+                    usage = response.usage_metadata
+                if response.error_code:
+                    outcome = "error"
+                yield response
+        except BaseException as e:
+            outcome = "cancelled" if type(e).__name__ in ("CancelledError", "GeneratorExit") else "error"
+            raise
+        finally:
+            attrs = {"chunks": chunks}
+            if usage is not None:
+                attrs["prompt_tokens"] = usage.prompt_token_count or 0
+                attrs["output_tokens"] = usage.candidates_token_count or 0
+                telemetry.incr("daedalus_model_tokens_total", attrs["prompt_tokens"], model=self.model, kind="prompt")
+                telemetry.incr("daedalus_model_tokens_total", attrs["output_tokens"], model=self.model, kind="output")
+            telemetry.record(f"model.{self.model}", time.perf_counter() - started, outcome, **attrs)
@@ -0,0 +1,234 @@
+import asyncio
+import os
+import zipfile
+from pathlib import Path
+from google.genai import types
+from .workers import worker_pool, replacing, LoopLocal
+from .telemetry import telemetry
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated packages built after a calendar is complete; empty disables packaging
+PACKAGE_FORMATS = [f.strip().lower() for f in os.environ.get("DAEDALUS_PACKAGE_FORMATS", "zip,pdf").split(",") if f.strip()]
+# Packages up to this size are also delivered as artifacts; larger ones stay on disk.
+# Delivering one holds the whole file in memory, once per concurrent build.
+MAX_ARTIFACT_BYTES = int(float(os.environ.get("DAEDALUS_PACKAGE_ARTIFACT_MAX_MB", "16")) * 1024 * 1024)
+# PDF pages are sized so the images print at this resolution
+PRINT_DPI = int(os.environ.get("DAEDALUS_PRINT_DPI", "300"))
+PDF_JPEG_QUALITY = int(os.environ.get("DAEDALUS_PDF_JPEG_QUALITY", "92"))
+# Package builds (and artifact deliveries) at a time per event loop; each holds
+# at most one decoded image or one package
+MAX_CONCURRENT_BUILDS = int(os.environ.get("DAEDALUS_PACKAGE_CONCURRENCY", "2"))
+
+PACKAGE_MIME_TYPES = {
+    "zip": "application/zip",
+    "pdf": "application/pdf",
+}
+
+
+def build_zip(files: list, target: Path) -> int:
+    """
+    Streams files into a ZIP archive, one chunk at a time.
+
+    Images are already compressed, so entries are stored rather than deflated.
+
+    Args:
+        files: (path on disk, name in the archive) pairs.
+        target: The archive to write; replaced atomically.
+
+    Returns:
+        int: Size of the archive in bytes.
+    """
+    target = Path(target)
+    with replacing(target) as tmp_path:
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for path, name in files:
+                archive.write(path, arcname=name)
+        # Measured before the rename; a concurrent build may replace the target right after
+        size = tmp_path.stat().st_size
+    return size
+
+
+class _PdfWriter:
+    """
+    Writes a PDF of full-page JPEG images straight to a file.
+
+    Each image is encoded into its page's /DCTDecode stream as the page is
+    added, so only one decoded image is in memory at a time. Stream lengths
+    are written as indirect objects after each stream, and the page tree,
+    catalog and cross-reference table at the end.
+    """
+
+    CATALOG, PAGES = 1, 2
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self.pages = []
+        self.next_id = 3
+        self.f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _reserve(self) -> int:
+        self.next_id += 1
+        return self.next_id - 1
+
+    def _begin(self, obj_id: int):
+        self.offsets[obj_id] = self.f.tell()
+        self.f.write(f"{obj_id} 0 obj\n".encode("ascii"))
+
+    def _object(self, obj_id: int, body: str):
+        self._begin(obj_id)
+        self.f.write(f"{body}\nendobj\n".encode("ascii"))
+
+    def _stream(self, obj_id: int, dictionary: str, write) -> int:
+        length_id = self._reserve()
+        self._begin(obj_id)
+        self.f.write(f"<< {dictionary} /Length {length_id} 0 R >>\nstream\n".encode("ascii"))
+        start = self.f.tell()
+        write(self.f)
+        length = self.f.tell() - start
+        self.f.write(b"\nendstream\nendobj\n")
+        self._object(length_id, str(length))
+        return length
+
+    def add_image_page(self, image, dpi: int, quality: int):
+        width_pt = image.width * 72 / dpi
+        height_pt = image.height * 72 / dpi
+        image_id, content_id, page_id = self._reserve(), self._reserve(), self._reserve()
+        self._stream(
+            image_id,
+            f"/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+            "/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode",
+            lambda f: image.save(f, format="JPEG", quality=quality, subsampling=0, dpi=(dpi, dpi)),
+        )
+        content = f"q {width_pt:.2f} 0 0 {height_pt:.2f} 0 0 cm /Im0 Do Q".encode("ascii")
+        self._stream(content_id, "", lambda f: f.write(content))
+        self._object(
+            page_id,
+            f"<< /Type /Page /Parent {self.PAGES} 0 R /MediaBox [0 0 {width_pt:.2f} {height_pt:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>",
+        )
+        self.pages.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.pages)
+        self._object(self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>")
+        self._object(self.CATALOG, f"<< /Type /Catalog /Pages {self.PAGES} 0 R >>")
+        xref_offset = self.f.tell()
+        self.f.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode("ascii"))
+        for obj_id in range(1, self.next_id):
+            self.f.write(f"{self.offsets[obj_id]:010d} 00000 n \n".encode("ascii"))
+        self.f.write(
+            f"trailer\n<< /Size {self.next_id} /Root {self.CATALOG} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+        )
+
+
+def build_pdf(images: list, target: Path, dpi: int = PRINT_DPI, quality: int = PDF_JPEG_QUALITY) -> int:
+    """
+    Builds a print-ready PDF with one full-bleed page per image, in order.
+
+    Pages are sized to print the images at `dpi`. Images are decoded and
+    encoded to JPEG one at a time directly into the file, so memory use does
+    not grow with the number of pages.
+
+    Args:
+        images: Paths of the page images.
+        target: The PDF to write; replaced atomically.
+
+    Returns:
+        int: Size of the PDF in bytes.
+    """
+    from PIL import Image
+
+    target = Path(target)
+    with replacing(target) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            writer = _PdfWriter(f)
+            for path in images:
+                with Image.open(path) as image:
+                    # JPEG has no alpha; the templates are opaque anyway
+                    page = image.convert("RGB") if image.mode != "RGB" else image
+                    writer.add_image_page(page, dpi, quality)
+                    del page
+            writer.close()
+            size = f.tell()
+    return size
+
+
+_build_slots = LoopLocal(lambda: asyncio.Semaphore(MAX_CONCURRENT_BUILDS))
+
+
+def _slots() -> asyncio.Semaphore:
+    return _build_slots.get()
+
+
+async def package_calendar(job, tool_context, formats: list = PACKAGE_FORMATS) -> dict:
+    """
+    Packages a complete calendar job as a ZIP of all deliverables and a print-ready PDF.
+
+    Packages are written into the job folder and rebuilt only when missing or
+    older than the manifest. Those up to `MAX_ARTIFACT_BYTES` are delivered as
+    artifacts, unless the session already holds that exact file; larger ones
+    are only referenced by path.
+
+    Returns:
+        dict: {format: {"path", "bytes", "mtime", "artifact"}}, where "artifact"
+        is the artifact filename or None.
+    """
+    months = sorted(job.done_months())
+    resolution = job.manifest["resolution"]
+    deliverables = job.manifest.get("deliverables", [resolution])
+    originals = [job.folder / job.month(month)["output"] for month in months]
+
+    files = []
+    for res in deliverables:
+        for month, original in zip(months, originals):
+            if res == resolution:
+                path = original
+            else:
+                path = job.folder / job.month(month)["derived"][res]
+            # Same names as the chat artifacts, e.g. "3-2026-4K.png" when several sizes are delivered
+            suffix = f"-{res}" if len(deliverables) > 1 else ""
+            files.append((path, f"{month}-2026{suffix}{path.suffix}"))
+
+    builders = {
+        "zip": (build_zip, files, worker_pool.run_io),
+        "pdf": (build_pdf, originals, worker_pool.run_cpu),
+    }
+    manifest_mtime = (job.folder / "manifest.json").stat().st_mtime
+    sent = tool_context.state.get("user:calendar_packages") or {}
+    packages = {}
+    for kind in formats:
+        if kind not in builders:
+            logger.warning(f"Unknown package format: {kind}")
+            continue
+        build, inputs, run = builders[kind]
+        target = job.folder / f"calendar-{job.job_id}.{kind}"
+        # The slot also bounds delivery, which reads the whole package into memory
+        async with _slots():
+            async with telemetry.span(f"package.{kind}", job_id=job.job_id, files=len(inputs)) as span:
+                if target.exists() and target.stat().st_mtime >= manifest_mtime:
+                    size = target.stat().st_size
+                else:
+                    size = await run(build, inputs, target)
+                span.set(bytes=size)
+            package = {"path": str(target), "bytes": size, "mtime": target.stat().st_mtime, "artifact": None}
+
+            previous = sent.get(kind) or {}
+            if size > MAX_ARTIFACT_BYTES:
+                logger.info(f"{target.name} is {size / 1e6:.0f} MB, delivering it by path only")
+            elif previous.get("artifact") and all(previous.get(key) == package[key] for key in ("path", "bytes", "mtime")):
+                # The session already holds this exact package, so don't store another version
+                logger.info(f"{target.name} already delivered in this session")
+                package["artifact"] = previous["artifact"]
+            else:
+                data = await worker_pool.run_io(target.read_bytes)
+                await tool_context.save_artifact(
+                    filename=target.name,
+                    artifact=types.Part.from_bytes(data=data, mime_type=PACKAGE_MIME_TYPES[kind]),
+                )
+                del data
+                package["artifact"] = target.name
+        packages[kind] = package
+    return packages
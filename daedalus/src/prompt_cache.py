@@ -0,0 +1,220 @@
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from .result_cache import CACHE_DIR
+from .workers import write_bytes
+from .telemetry import telemetry
+from .prompts import validate_prompts
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = int(os.environ.get("DAEDALUS_PROMPT_CACHE_ENTRIES", "500"))
+TTL_SECONDS = float(os.environ.get("DAEDALUS_PROMPT_CACHE_TTL_HOURS", "720")) * 3600
+# Minimum Jaccard similarity of two themes, by character trigrams and by words, for a
+# fuzzy hit. 1.0 only allows exact (normalized) matches. Fuzzy hits are only ever
+# served from themes the same user asked for, since themes can carry personal details.
+SIMILARITY_THRESHOLD = float(os.environ.get("DAEDALUS_PROMPT_CACHE_SIMILARITY", "1.0"))
+
+# Words customers add around a theme that don't change the prompts
+STOPWORDS = {
+    "a", "an", "the", "and", "of", "for", "with", "in", "on",
+    "theme", "themed", "style", "styled", "calendar", "please", "design", "vibe", "vibes",
+}
+
+
+def normalize_theme(theme: str) -> str:
+    """
+    Returns the cache key of a theme: lowercase, accents and punctuation removed,
+    filler words dropped and the remaining words sorted.
+
+    "The Star Wars theme!" and "star-wars" both become "star wars".
+    """
+    text = unicodedata.normalize("NFKD", theme).encode("ascii", "ignore").decode("ascii").lower()
+    words = [word for word in re.findall(r"[a-z0-9]+", text) if word not in STOPWORDS]
+    return " ".join(sorted(set(words)))
+
+
+def theme_shingles(key: str) -> frozenset:
+    """Character trigrams of a normalized theme, padded so short words still match."""
+    padded = f" {key} "
+    return frozenset(padded[i:i + 3] for i in range(max(1, len(padded) - 2)))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class PromptSetCache:
+    """
+    Persistent cache of validated prompt sets, keyed by normalized theme.
+
+    Exact (normalized) matches are shared between users. When `similarity` is
+    below 1.0, near-duplicate themes ("diwali festival lights" vs "diwali
+    lights") are also matched, by trigram and word similarity, but only
+    against themes the same user asked for. Entries expire
+    after `ttl` seconds and the least recently used are evicted beyond
+    `max_entries`. The cache is stored as one JSON file.
+
+    Methods do blocking file I/O; async callers should run them on the worker pool.
+    """
+
+    def __init__(
+        self,
+        path: Path = CACHE_DIR / "prompts.json",
+        max_entries: int = MAX_ENTRIES,
+        ttl: float = TTL_SECONDS,
+        similarity: float = SIMILARITY_THRESHOLD,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries: "OrderedDict[str, dict]" = None
+        self._shingles: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        entries = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f).get("entries", [])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable prompt cache {self.path}: {e}")
+        # Stored least recently used first
+        self._entries = OrderedDict(
+            (entry["key"], entry) for entry in entries if validate_prompts(entry.get("prompts"))
+        )
+        self._shingles = {key: theme_shingles(key) for key in self._entries}
+
+    def _save(self):
+        payload = json.dumps({"entries": list(self._entries.values())}, indent=2)
+        write_bytes(self.path, payload.encode("utf-8"))
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return now - entry["created_at"] > self.ttl
+
+    def _forget(self, key: str):
+        self._entries.pop(key, None)
+        self._shingles.pop(key, None)
+
+    def get(self, theme: str, exclude: list = None, user_id: str = None):
+        """
+        Returns the cached prompt set for a theme or a near-duplicate of it.
+
+        Args:
+            theme: The theme as the customer phrased it.
+            exclude: A prompt set that must not be returned, e.g. the one the
+                customer already has and wants replaced. Counts as a miss.
+            user_id: The customer asking. Without it only exact matches are served.
+
+        Returns:
+            tuple | None: (prompts, matched theme key, similarity), or None on a miss.
+        """
+        key = normalize_theme(theme)
+        now = time.time()
+        with self._lock:
+            self._load()
+            match, score = None, 0.0
+            if key in self._entries:
+                match, score = key, 1.0
+            elif key and user_id is not None and self.similarity < 1.0:
+                shingles, words = theme_shingles(key), frozenset(key.split())
+                for candidate, candidate_shingles in self._shingles.items():
+                    if user_id not in self._entries[candidate].get("users", []):
+                        continue
+                    candidate_score = min(
+                        jaccard(shingles, candidate_shingles), jaccard(words, frozenset(candidate.split()))
+                    )
+                    if candidate_score >= self.similarity and candidate_score > score:
+                        match, score = candidate, candidate_score
+
+            if match is not None and self._expired(self._entries[match], now):
+                self._forget(match)
+                self._save()
+                match = None
+            if match is not None and exclude is not None and self._entries[match]["prompts"] == exclude:
+                match = None
+            if match is None:
+                self.misses += 1
+                telemetry.incr("daedalus_prompt_cache_requests_total", outcome="miss")
+                return None
+
+            entry = self._entries[match]
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["last_used"] = now
+            self._entries.move_to_end(match)
+            if match == key:
+                self.hits += 1
+                telemetry.incr("daedalus_prompt_cache_requests_total", outcome="hit")
+            else:
+                self.fuzzy_hits += 1
+                telemetry.incr("daedalus_prompt_cache_requests_total", outcome="fuzzy_hit")
+            return list(entry["prompts"]), match, score
+
+    def put(self, theme: str, prompts: list, user_id: str = None) -> bool:
+        """
+        Stores a prompt set if it passes `validate_prompts`, replacing any set for the same theme.
+
+        `user_id` is recorded so the user's later, similar themes can reuse the set.
+
+        Returns:
+            bool: Whether the set was stored.
+        """
+        key = normalize_theme(theme)
+        if not key or not validate_prompts(prompts):
+            return False
+        now = time.time()
+        with self._lock:
+            self._load()
+            previous = self._entries.get(key)
+            users = list(previous.get("users", [])) if previous and previous["prompts"] == list(prompts) else []
+            if user_id is not None and user_id not in users:
+                users.append(user_id)
+            self._forget(key)
+            self._entries[key] = {
+                "key": key,
+                "theme": theme,
+                "prompts": list(prompts),
+                "created_at": now,
+                "last_used": now,
+                "hits": 0,
+                "users": users,
+            }
+            self._shingles[key] = theme_shingles(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._shingles.pop(evicted, None)
+                self.evictions += 1
+            self._save()
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries or {}),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+prompt_cache = PromptSetCache()
+telemetry.register_stats("prompt_cache", prompt_cache.stats)
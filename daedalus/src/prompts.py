@@ -0,0 +1,108 @@
+import ast
+import json
+import re
+from typing import Any, List
+from pydantic import BaseModel, Field
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROMPT_COUNT = 12
+PROMPT_PREFIX = "Edit this image"
+
+
+class MonthPrompt(BaseModel):
+    """The edit prompt for one calendar month."""
+
+    month: int = Field(
+        description="Month number, 1 (January) to 12 (December).",
+        json_schema_extra={"minimum": 1, "maximum": PROMPT_COUNT},
+    )
+    prompt: str = Field(description=f'The edit prompt. Must start with "{PROMPT_PREFIX}".')
+
+
+class CalendarPrompts(BaseModel):
+    """Structured output of the prompt_generator sub-agent."""
+
+    # The array bounds are only sent to the model as schema constraints, not
+    # enforced here, so a short answer can be repaired month by month
+    prompts: List[MonthPrompt] = Field(
+        description="Exactly one entry per month, January to December.",
+        json_schema_extra={"minItems": PROMPT_COUNT, "maxItems": PROMPT_COUNT},
+    )
+
+
+class PromptRepair(BaseModel):
+    """Structured output of the prompt_repairer sub-agent: prompts for the requested months only."""
+
+    prompts: List[MonthPrompt] = Field(description="One entry per requested month.")
+
+
+def validate_prompts(prompts) -> bool:
+    """True for a usable prompt set: exactly 12 strings that each start with "Edit this image"."""
+    return (
+        isinstance(prompts, list)
+        and len(prompts) == PROMPT_COUNT
+        and all(isinstance(p, str) and p.strip().startswith(PROMPT_PREFIX) for p in prompts)
+    )
+
+
+def _fix_prompt(prompt: Any):
+    """Returns a usable prompt, or None if there is nothing to salvage."""
+    if not isinstance(prompt, str) or not prompt.strip():
+        return None
+    prompt = prompt.strip()
+    if prompt.lower().startswith(PROMPT_PREFIX.lower()):
+        return PROMPT_PREFIX + prompt[len(PROMPT_PREFIX):]
+    # The instruction is there, only the required opening is missing
+    return f"{PROMPT_PREFIX}: {prompt[0].lower()}{prompt[1:]}"
+
+
+def _parse_text(text: str) -> Any:
+    # Strip markdown code blocks (e.g., ```python ... ```)
+    clean_output = re.sub(r"^```[a-zA-Z]*\s*", "", text.strip())
+    clean_output = re.sub(r"\s*```$", "", clean_output)
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            return parse(clean_output)
+        except (ValueError, SyntaxError):
+            continue
+    return None
+
+
+def parse_prompt_output(raw_output: Any) -> dict:
+    """
+    Extracts the valid month prompts from a prompt_generator or prompt_repairer answer.
+
+    Accepts the structured output (`{"prompts": [{"month": .., "prompt": ..}]}`)
+    as well as older free-form answers (a list of strings, possibly as text).
+    Invalid, duplicate and out-of-range entries are dropped; prompts missing
+    only the "Edit this image" opening are fixed in place.
+
+    Returns:
+        dict: {month number: prompt}.
+    """
+    if isinstance(raw_output, str):
+        raw_output = _parse_text(raw_output)
+    if isinstance(raw_output, dict):
+        raw_output = raw_output.get("prompts")
+    if not isinstance(raw_output, list):
+        return {}
+
+    by_month = {}
+    for index, item in enumerate(raw_output, start=1):
+        if isinstance(item, dict):
+            month, prompt = item.get("month"), item.get("prompt")
+        else:
+            # Plain lists are in month order
+            month, prompt = index, item
+        if not isinstance(month, int) or not 1 <= month <= PROMPT_COUNT or month in by_month:
+            continue
+        prompt = _fix_prompt(prompt)
+        if prompt is not None:
+            by_month[month] = prompt
+    return by_month
+
+
+def missing_months(by_month: dict) -> list:
+    return [month for month in range(1, PROMPT_COUNT + 1) if month not in by_month]
@@ -0,0 +1,270 @@
+import asyncio
+import os
+import time
+from collections import deque
+from google.genai import errors
+from .telemetry import telemetry
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Image call timeout: a multiple of the observed p99 latency, within bounds.
+# Until enough calls were seen for a resolution, the default applies.
+DEFAULT_TIMEOUT = float(os.environ.get("DAEDALUS_IMAGE_TIMEOUT", "60"))
+MIN_TIMEOUT = float(os.environ.get("DAEDALUS_IMAGE_TIMEOUT_MIN", "15"))
+MAX_TIMEOUT = float(os.environ.get("DAEDALUS_IMAGE_TIMEOUT_MAX", "180"))
+TIMEOUT_P99_MULTIPLIER = float(os.environ.get("DAEDALUS_IMAGE_TIMEOUT_P99_MULTIPLIER", "2.0"))
+MIN_LATENCY_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+# Hedging: a duplicate call fires once a call runs longer than this percentile
+HEDGE_PERCENTILE = float(os.environ.get("DAEDALUS_HEDGE_PERCENTILE", "95"))
+# Extra calls allowed per primary call (0 disables hedging), with a small burst
+HEDGE_BUDGET = float(os.environ.get("DAEDALUS_HEDGE_BUDGET", "0.05"))
+HEDGE_BURST = float(os.environ.get("DAEDALUS_HEDGE_BURST", "3"))
+
+# Circuit breaker over the image model
+BREAKER_WINDOW = int(os.environ.get("DAEDALUS_BREAKER_WINDOW", "20"))
+BREAKER_FAILURE_RATIO = float(os.environ.get("DAEDALUS_BREAKER_FAILURE_RATIO", "0.5"))
+BREAKER_COOLDOWN = float(os.environ.get("DAEDALUS_BREAKER_COOLDOWN", "30"))
+BREAKER_MIN_CALLS = 10
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that the circuit breaker considers unhealthy."""
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    True for errors that say the upstream is unhealthy: 5xx responses, timeouts
+    and connection failures. Rate limiting and bad requests are not.
+    """
+    if isinstance(error, errors.ServerError):
+        return True
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(error, httpx.TransportError)
+
+
+class LatencyTracker:
+    """
+    Recent successful call latencies per key (e.g. resolution), for timeouts and hedging.
+
+    Only completed calls are samples. Calls that were cut off are counted
+    separately: their elapsed time is the timeout itself, so feeding it back
+    would raise the next timeout with every hung call.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = MIN_LATENCY_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict = {}
+        self.timeouts: dict = {}
+        self.cancelled: dict = {}
+
+    def observe(self, key: str, seconds: float):
+        """Records the latency of a completed call."""
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def on_timeout(self, key: str):
+        self.timeouts[key] = self.timeouts.get(key, 0) + 1
+
+    def on_cancelled(self, key: str):
+        """Counts a call abandoned before it finished (timed out, or lost to its hedge)."""
+        self.cancelled[key] = self.cancelled.get(key, 0) + 1
+
+    def percentile(self, key: str, pct: float):
+        """Returns the latency percentile for `key`, or None until enough samples were seen."""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def timeout(self, key: str) -> float:
+        p99 = self.percentile(key, 99)
+        if p99 is None:
+            return DEFAULT_TIMEOUT
+        return min(MAX_TIMEOUT, max(MIN_TIMEOUT, p99 * TIMEOUT_P99_MULTIPLIER))
+
+    def hedge_delay(self, key: str):
+        """Seconds after which a call is hedged, or None while there is too little data."""
+        return self.percentile(key, HEDGE_PERCENTILE)
+
+    def stats(self) -> dict:
+        stats = {}
+        for key in sorted(set(self._samples) | set(self.timeouts) | set(self.cancelled)):
+            stats[f"{key}_p50"] = round(self.percentile(key, 50) or 0.0, 3)
+            stats[f"{key}_p95"] = round(self.percentile(key, 95) or 0.0, 3)
+            stats[f"{key}_timeout"] = round(self.timeout(key), 3)
+            stats[f"{key}_timeouts"] = self.timeouts.get(key, 0)
+            stats[f"{key}_cancelled"] = self.cancelled.get(key, 0)
+        return stats
+
+
+class HedgeBudget:
+    """
+    Limits hedged calls to a fraction of primary calls.
+
+    Every primary call earns `ratio` tokens (up to `burst`); a hedge spends one.
+    """
+
+    def __init__(self, ratio: float = HEDGE_BUDGET, burst: float = HEDGE_BURST):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst if ratio > 0 else 0.0
+        self.hedges = 0
+        self.denied = 0
+
+    def on_call(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.hedges += 1
+            return True
+        self.denied += 1
+        return False
+
+    def stats(self) -> dict:
+        return {"ratio": self.ratio, "tokens": round(self.tokens, 3), "hedges": self.hedges, "denied": self.denied}
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an upstream is unhealthy.
+
+    Opens when at least half (`failure_ratio`) of the last `window` calls were
+    upstream failures. After `cooldown` seconds one probe call is let through;
+    its success closes the circuit, its failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        window: int = BREAKER_WINDOW,
+        failure_ratio: float = BREAKER_FAILURE_RATIO,
+        cooldown: float = BREAKER_COOLDOWN,
+        min_calls: int = BREAKER_MIN_CALLS,
+    ):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+        self.min_calls = min(min_calls, window)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._results = deque(maxlen=window)
+        self._probing = False
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpenError: If the circuit is open (or a probe is already in flight).
+        """
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        if self.state != self.CLOSED:
+            self.rejected += 1
+            telemetry.incr("daedalus_circuit_rejections_total", circuit=self.name)
+            retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(f"{self.name} is temporarily unavailable, retry in about {retry_in:.0f}s")
+
+    def on_success(self):
+        self._results.append(True)
+        # Calls that started before the circuit opened don't close it; only the probe does
+        if self.state == self.HALF_OPEN:
+            logger.info(f"Circuit {self.name} closed")
+            self.state = self.CLOSED
+            self._probing = False
+            self._results.clear()
+
+    def on_failure(self, error: BaseException):
+        """Records a failed call; only upstream failures count against the circuit."""
+        if not is_upstream_failure(error):
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+            return
+        self._results.append(False)
+        failures = self._results.count(False)
+        if self.state == self.HALF_OPEN or (
+            self.state == self.CLOSED
+            and len(self._results) >= self.min_calls
+            and failures / len(self._results) >= self.failure_ratio
+        ):
+            logger.error(f"Circuit {self.name} opened after {failures}/{len(self._results)} failed calls: {error}")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self) -> dict:
+        return {
+            "open": int(self.state != self.CLOSED),
+            "recent_failures": self._results.count(False),
+            "recent_calls": len(self._results),
+            "rejected": self.rejected,
+        }
+
+
+async def hedged_call(call_factory, hedge_factory, hedge_after, budget: HedgeBudget):
+    """
+    Awaits `call_factory()`, racing it against a duplicate if it is still running after `hedge_after` seconds.
+
+    The duplicate (from `hedge_factory()`) only fires if the budget allows;
+    whichever call finishes first wins and the other is cancelled. If one
+    call fails, the other one is still awaited.
+
+    Returns:
+        tuple: (result, whether the hedge won).
+    """
+    budget.on_call()
+    primary = asyncio.ensure_future(call_factory())
+    if hedge_after is None:
+        return await primary, False
+
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_after)
+        if done:
+            return primary.result(), False
+        if not budget.try_spend():
+            return await primary, False
+
+        telemetry.incr("daedalus_image_hedges_total")
+        hedge = asyncio.ensure_future(hedge_factory())
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        telemetry.incr("daedalus_image_hedge_wins_total")
+                    return task.result(), task is hedge
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# One per process: every session's calls feed the same latency samples, hedge budget and circuit
+image_latency = LatencyTracker()
+image_hedge_budget = HedgeBudget()
+image_circuit = CircuitBreaker("image model")
+telemetry.register_stats("image_latency", image_latency.stats)
+telemetry.register_stats("image_hedging", image_hedge_budget.stats)
+telemetry.register_stats("image_circuit", image_circuit.stats)
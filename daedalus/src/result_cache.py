@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from .workers import MIME_EXTENSIONS, output_extension, worker_pool, write_bytes
+from .telemetry import telemetry
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(os.environ.get("DAEDALUS_CACHE_DIR", Path(__file__).parent.parent.parent / ".cache" / "daedalus"))
+MAX_CACHE_BYTES = int(os.environ.get("DAEDALUS_IMAGE_CACHE_MB", "2048")) * 1024 * 1024
+
+EXTENSION_MIMES = {ext: mime for mime, ext in MIME_EXTENSIONS.items()}
+
+
+def image_cache_key(
+    model: str,
+    prompt: str,
+    template_sha256: str,
+    aspect_ratio: str,
+    resolution: str,
+    variant: int = 0,
+) -> str:
+    """Returns the content address of an image request: a hash of its exact inputs."""
+    request = {
+        "model": model,
+        "prompt": prompt,
+        "template": template_sha256,
+        "aspect_ratio": aspect_ratio,
+        "resolution": resolution,
+    }
+    # Only explicit re-renders carry a variant, so first renders keep their keys
+    if variant:
+        request["variant"] = variant
+    payload = json.dumps(request, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ImageResultCache:
+    """
+    Disk-backed, size-bounded cache of generated images keyed by request hash.
+
+    Entries are evicted least-recently-used first once the total size exceeds
+    `max_bytes`. Concurrent misses for the same key share one render.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR / "images", max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, tuple]" = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _load_index(self):
+        # Rebuild the LRU order from the files left by previous runs
+        if self._index is not None:
+            return
+        entries = []
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob("*/*"):
+                if path.suffix in EXTENSION_MIMES:
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, path.stem, path, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, (path, size)) for _, key, path, size in entries)
+        self._bytes = sum(size for _, _, _, size in entries)
+
+    def get(self, key: str):
+        """
+        Reads a cached image from disk.
+
+        Returns:
+            tuple | None: (image bytes, mime type), or None on a miss.
+        """
+        with self._lock:
+            self._load_index()
+            entry = self._index.get(key)
+            if entry is not None:
+                self._index.move_to_end(key)
+        if entry is None:
+            return None
+        path, _ = entry
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(key)
+            return None
+        return data, EXTENSION_MIMES[path.suffix]
+
+    def put(self, key: str, data: bytes, mime_type: str):
+        """Writes an image to the cache and evicts old entries if over budget."""
+        path = self.cache_dir / key[:2] / f"{key}{output_extension(mime_type)}"
+        write_bytes(path, data)
+        with self._lock:
+            self._load_index()
+            self._forget(key)
+            self._index[key] = (path, len(data))
+            self._bytes += len(data)
+            self._evict()
+
+    def _forget(self, key: str):
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key, (path, size) = self._index.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            logger.info(f"Evicted cached image {key[:12]}")
+
+    async def get_or_render(self, key: str, render):
+        """
+        Returns the cached image for `key`, rendering it on a miss.
+
+        Concurrent callers for the same key share one in-flight render, which
+        keeps running (and lands in the cache) even if its callers are cancelled.
+
+        Args:
+            key: The request hash, see `image_cache_key`.
+            render: Zero-argument callable returning a coroutine that yields (bytes, mime type).
+
+        Returns:
+            tuple: (image bytes, mime type).
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            telemetry.incr("daedalus_image_cache_requests_total", outcome="coalesced")
+            return await asyncio.shield(task)
+
+        cached = await worker_pool.run_io(self.get, key)
+        if cached is not None:
+            self.hits += 1
+            telemetry.incr("daedalus_image_cache_requests_total", outcome="hit")
+            logger.info(f"Image cache hit for {key[:12]}")
+            return cached
+
+        # Another caller may have started the render while we were reading disk
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            telemetry.incr("daedalus_image_cache_requests_total", outcome="coalesced")
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        telemetry.incr("daedalus_image_cache_requests_total", outcome="miss")
+        task = asyncio.ensure_future(self._render_and_store(key, render))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _render_and_store(self, key: str, render):
+        data, mime_type = await render()
+        await worker_pool.run_io(self.put, key, data, mime_type)
+        return data, mime_type
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and disk usage."""
+        with self._lock:
+            self._load_index()
+            return {
+                "entries": len(self._index),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "inflight": len(self._inflight),
+            }
+
+
+image_cache = ImageResultCache()
+telemetry.register_stats("image_cache", image_cache.stats)
@@ -0,0 +1,237 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from .telemetry import telemetry
+from .workers import LoopLocal
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first. Tier names follow the product brief.
+TIER_PRIORITY = {
+    "premium": 0,
+    "smart": 1,
+    "value+": 2,
+    "value": 3,
+}
+DEFAULT_PRIORITY = TIER_PRIORITY["value"]
+# Bulk orders are background work: they run below every interactive order,
+# so a large order never holds back other customers' calendars
+BULK_PRIORITY_OFFSET = max(TIER_PRIORITY.values()) + 1
+
+MAX_CONCURRENCY = int(os.environ.get("DAEDALUS_IMAGE_CONCURRENCY", "8"))
+RATE_PER_SECOND = float(os.environ.get("DAEDALUS_IMAGE_RPS", "2.0"))
+BURST = int(os.environ.get("DAEDALUS_IMAGE_BURST", "4"))
+
+
+def tier_priority(tier: str) -> int:
+    """Maps a product tier name (e.g. "Premium") to a scheduling priority."""
+    return TIER_PRIORITY.get((tier or "").strip().lower(), DEFAULT_PRIORITY)
+
+
+def bulk_priority(tier: str) -> int:
+    """Maps a bulk order's product tier to a priority below all interactive orders, keeping the tier order among bulk orders."""
+    return BULK_PRIORITY_OFFSET + tier_priority(tier)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Returns True if an exception is a 429 / RESOURCE_EXHAUSTED response."""
+    return getattr(error, "code", None) == 429 or getattr(error, "status", None) == "RESOURCE_EXHAUSTED"
+
+
+def retry_after_seconds(error: Exception):
+    """
+    Extracts the server-suggested delay from a rate-limited error, if any.
+
+    Looks at the Retry-After header first, then at the google.rpc.RetryInfo
+    "retryDelay" (e.g. "17s") in the error details.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    match = re.search(r"retryDelay'?\"?\s*:\s*'?\"?(\d+(?:\.\d+)?)s", str(getattr(error, "details", "")))
+    if match:
+        return float(match.group(1))
+    return None
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket whose refill rate backs off on 429s and recovers on success (AIMD).
+
+    A Retry-After hint pauses the bucket entirely until the hinted time.
+    """
+
+    def __init__(self, rate: float, capacity: int, min_rate: float = 0.1):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = LoopLocal(asyncio.Lock)
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # The lock keeps waiters in FIFO order
+        async with self._lock.get():
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self):
+        # Additive increase: regain the full rate over roughly ten successes
+        self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def on_throttle(self, retry_after=None):
+        # Multiplicative decrease, and drain what is left of the burst
+        self._refill(time.monotonic())
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = min(self.tokens, 0.0)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        logger.warning(f"Image API throttled, rate now {self.rate:.2f}/s, retry_after={retry_after}")
+
+
+class ImageRequestScheduler:
+    """
+    Process-wide scheduler for image model calls.
+
+    Requests are grouped by order and priority. The highest priority level with
+    pending work is served first; within a level, orders are served round-robin
+    one request at a time so a large order cannot starve smaller ones. At most
+    `max_concurrency` requests run at once and starts are paced by an adaptive
+    token bucket.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, rate: float = RATE_PER_SECOND, burst: int = BURST):
+        self.max_concurrency = max_concurrency
+        self.bucket = AdaptiveTokenBucket(rate, burst)
+        # priority -> OrderedDict(order_id -> deque of waiting futures)
+        self._queues: dict = {}
+        self._active = 0
+        self._wait_times = deque(maxlen=1000)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.throttled = 0
+
+    def _queue_depth(self) -> int:
+        return sum(len(waiters) for orders in self._queues.values() for waiters in orders.values())
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._active += 1
+            waiter.set_result(None)
+
+    def _next_waiter(self):
+        for priority in sorted(self._queues):
+            orders = self._queues[priority]
+            while orders:
+                order_id, waiters = next(iter(orders.items()))
+                waiter = waiters.popleft() if waiters else None
+                # Rotate the order to the back so the next slot goes to another order
+                del orders[order_id]
+                if waiters:
+                    orders[order_id] = waiters
+                if waiter is not None and not waiter.done():
+                    return waiter
+            del self._queues[priority]
+        return None
+
+    def _release(self):
+        self._active -= 1
+        self._dispatch()
+
+    async def run(self, order_id: str, request_factory, priority: int = DEFAULT_PRIORITY):
+        """
+        Runs one model request once a slot and a rate token are available.
+
+        Args:
+            order_id: Identifier used to share capacity fairly between orders.
+            request_factory: Zero-argument callable returning the request coroutine.
+            priority: Scheduling priority, see `tier_priority`.
+
+        Returns:
+            The result of the request coroutine.
+        """
+        self.submitted += 1
+        enqueued = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(priority, OrderedDict()).setdefault(order_id, deque()).append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            telemetry.record("scheduler.queue", time.monotonic() - enqueued, "cancelled", priority=priority)
+            # A slot may have been granted just before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+        try:
+            await self.bucket.acquire()
+            wait_time = time.monotonic() - enqueued
+            self._wait_times.append(wait_time)
+            telemetry.record("scheduler.queue", wait_time, priority=priority)
+            result = await request_factory()
+        except Exception as e:
+            self.failed += 1
+            if is_rate_limited(e):
+                self.throttled += 1
+                self.bucket.on_throttle(retry_after_seconds(e))
+            raise
+        finally:
+            self._release()
+
+        self.completed += 1
+        self.bucket.on_success()
+        return result
+
+    def stats(self) -> dict:
+        """Returns queue depth, wait time and throughput counters."""
+        waits = sorted(self._wait_times)
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": self._queue_depth(),
+            "queue_depth_by_priority": {
+                priority: sum(len(w) for w in orders.values()) for priority, orders in self._queues.items()
+            },
+            "rate_per_second": round(self.bucket.rate, 3),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "throttled": self.throttled,
+            "wait_seconds_mean": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "wait_seconds_p95": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0,
+            "wait_seconds_max": round(waits[-1], 3) if waits else 0.0,
+        }
+
+
+# One per process, so the rate limit and concurrency cap hold across all sessions
+image_scheduler = ImageRequestScheduler()
+telemetry.register_stats("scheduler", image_scheduler.stats)
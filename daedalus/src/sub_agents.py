@@ -1,8 +1,10 @@
 from google.adk.agents.llm_agent import Agent
+from .models import InstrumentedGemini
+from .prompts import CalendarPrompts, PromptRepair
 
 # Prompt Generator Agent
 prompt_generator = Agent(
-    model='gemini-2.5-flash',
+    model=InstrumentedGemini(model='gemini-2.5-flash'),
     name='prompt_generator',
     description='Generates image editing prompts based on a theme.',
     instruction='''You are an expert creative prompt generator for image editing.
@@ -16,7 +18,30 @@ prompt_generator = Agent(
     5.  **No Image Editing**: You do not edit images yourself; you only generate the text prompts for an image editor tool.
     
     Output format:
-    Return a Python list of strings, e.g., ["Edit this image...", "Edit this image...", ...].
-    '''
+    Return JSON with a "prompts" array of exactly 12 objects, one per month in order from January (1) to December (12),
+    e.g., {"prompts": [{"month": 1, "prompt": "Edit this image..."}, ..., {"month": 12, "prompt": "Edit this image..."}]}.
+    ''',
+    # Constrained JSON output instead of free text that has to be parsed
+    output_schema=CalendarPrompts,
+)
+
+# Prompt Repairer Agent: fills in only the months the prompt generator got wrong
+prompt_repairer = Agent(
+    model=InstrumentedGemini(model='gemini-2.5-flash'),
+    name='prompt_repairer',
+    description='Writes image editing prompts for specific calendar months of a theme.',
+    instruction='''You are an expert creative prompt generator for image editing.
+    You receive a theme, the month numbers that still need a prompt, and the prompts already written for the other months.
+    Write one prompt for each requested month only, matching the theme and the style of the existing prompts.
+
+    Follow these strict guidelines for each prompt:
+    1.  **Start with "Edit this image"**: Every prompt must begin with this phrase.
+    2.  **Background Only**: Focus on editing the background to match the theme.
+    3.  **Preserve Text**: Explicitly state or ensure the prompt implies that the existing text content (dates, months) should remain as is.
+
+    Output format:
+    Return JSON with a "prompts" array holding one {"month": <number>, "prompt": "Edit this image..."} object per requested month.
+    ''',
+    output_schema=PromptRepair,
 )
 
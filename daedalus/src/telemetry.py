@@ -0,0 +1,383 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+import logging
+
+logger = logging.getLogger(__name__)
+
+# DAEDALUS_TELEMETRY=0 turns every span and counter into a no-op.
+# DAEDALUS_TRACE=0 keeps the histograms but stops retaining span trees.
+TELEMETRY_ENABLED = os.environ.get("DAEDALUS_TELEMETRY", "1") != "0"
+TRACE_ENABLED = os.environ.get("DAEDALUS_TRACE", "1") != "0"
+MAX_TRACES = int(os.environ.get("DAEDALUS_MAX_TRACES", "200"))
+# Children kept per span; a long bulk order would otherwise grow one trace without bound
+MAX_SPAN_CHILDREN = int(os.environ.get("DAEDALUS_MAX_SPAN_CHILDREN", "100"))
+
+# Seconds; covers everything from a cache hit to a slow 4K render
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+_current_span = contextvars.ContextVar("daedalus_current_span", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus style, cumulative on export)."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Approximates a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bound in enumerate(self.buckets):
+            seen += self.counts[i]
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Span:
+    """
+    A timed, nestable unit of work.
+
+    Usable as a sync or async context manager. On exit its duration is
+    recorded in the `daedalus_span_seconds` histogram labelled with the span
+    name and outcome; with tracing on, finished root spans and their children
+    are kept for export. Children beyond the telemetry's `max_children` are
+    only counted.
+    """
+
+    __slots__ = ("telemetry", "name", "attrs", "start", "duration", "outcome", "children", "dropped_children", "_token")
+
+    def __init__(self, telemetry: "Telemetry", name: str, attrs: dict):
+        self.telemetry = telemetry
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+        self.duration = 0.0
+        self.outcome = "ok"
+        self.children = []
+        self.dropped_children = 0
+        self._token = None
+
+    def set(self, **attrs):
+        """Adds attributes (e.g. payload bytes, cache hit) to the span."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        if self.telemetry.trace_enabled:
+            self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.outcome = "cancelled" if exc_type.__name__ == "CancelledError" else "error"
+            self.attrs.setdefault("error", exc_type.__name__)
+        if self._token is not None:
+            _current_span.reset(self._token)
+        self.telemetry._finish(self)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration": round(self.duration, 6),
+            "outcome": self.outcome,
+            # Copies: spans of background tasks can still add attributes or children
+            "attrs": dict(self.attrs),
+            "children": [child.to_dict() for child in list(self.children)],
+            "dropped_children": self.dropped_children,
+        }
+
+
+class _NoopSpan:
+    """Shared stand-in used when telemetry is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Telemetry:
+    """In-process spans, latency histograms, counters and stats gauges."""
+
+    def __init__(
+        self,
+        enabled: bool = TELEMETRY_ENABLED,
+        trace_enabled: bool = TRACE_ENABLED,
+        max_traces: int = MAX_TRACES,
+        max_children: int = MAX_SPAN_CHILDREN,
+    ):
+        self.enabled = enabled
+        self.trace_enabled = enabled and trace_enabled
+        self.max_children = max_children
+        self._histograms: dict = {}
+        self._counters: dict = {}
+        self._stats_providers: dict = {}
+        self._traces = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attrs):
+        """Starts a span, e.g. `async with telemetry.span("image.render", month=3):`."""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name: str, duration: float, outcome: str = "ok", **attrs):
+        """
+        Records an already-timed span under the current span.
+
+        For work that cannot hold a context manager open, such as an async
+        generator that yields across the caller's code.
+        """
+        if not self.enabled:
+            return
+        span = Span(self, name, attrs)
+        span.start = time.perf_counter() - duration
+        span.duration = duration
+        span.outcome = outcome
+        self._finish(span)
+
+    def _finish(self, span: Span):
+        self.observe("daedalus_span_seconds", span.duration, span=span.name, outcome=span.outcome)
+        if not self.trace_enabled:
+            return
+        parent = _current_span.get()
+        dropped = False
+        # snapshot() serializes the traces from the metrics server's thread
+        with self._lock:
+            if parent is None:
+                self._traces.append(span)
+            elif len(parent.children) < self.max_children:
+                parent.children.append(span)
+            else:
+                parent.dropped_children += 1
+                dropped = True
+        if dropped:
+            self.incr("daedalus_span_children_dropped_total", span=parent.name)
+
+    def observe(self, name: str, value: float, **labels):
+        """Records a value in a histogram."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """Increments a counter."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register_stats(self, name: str, provider):
+        """Exports the numeric values of `provider()` (a stats dict) as gauges."""
+        self._stats_providers[name] = provider
+
+    def _stats(self) -> dict:
+        stats = {}
+        for name, provider in self._stats_providers.items():
+            try:
+                stats[name] = provider()
+            except Exception as e:
+                logger.warning(f"Stats provider {name} failed: {e}")
+        return stats
+
+    def snapshot(self) -> dict:
+        """Returns all metrics (and, if tracing is on, recent traces) as a JSON-serializable dict."""
+        with self._lock:
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": round(h.sum, 6),
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99),
+                }
+                for (name, labels), h in self._histograms.items()
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+            traces = [span.to_dict() for span in self._traces]
+        return {"histograms": histograms, "counters": counters, "stats": self._stats(), "traces": traces}
+
+    def render_prometheus(self) -> str:
+        """Renders metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = [(name, labels, list(h.buckets), list(h.counts), h.count, h.sum) for (name, labels), h in self._histograms.items()]
+            counters = list(self._counters.items())
+
+        for name in sorted({h[0] for h in histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for hist_name, labels, buckets, counts, count, total in histograms:
+                if hist_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{name}_count{_labels(labels)} {count}")
+
+        for name in sorted({key[0] for key, _ in counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, labels), value in counters:
+                if counter_name == name:
+                    lines.append(f"{name}{_labels(labels)} {value}")
+
+        for provider, stats in self._stats().items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE daedalus_{provider}_{key} gauge")
+                    lines.append(f"daedalus_{provider}_{key} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._traces.clear()
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def instrument_tool(fn):
+    """
+    Wraps an agent tool in a `tool.<name>` span.
+
+    The wrapper keeps the tool's signature and docstring, so ADK builds the
+    same function declaration for it. Generator tools are timed from the first
+    to the last item they yield.
+    """
+    name = f"tool.{fn.__name__}"
+    if inspect.isasyncgenfunction(fn):
+        @functools.wraps(fn)
+        async def async_gen_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                async with contextlib.aclosing(fn(*args, **kwargs)) as items:
+                    async for item in items:
+                        yield item
+            except BaseException as e:
+                outcome = "cancelled" if type(e).__name__ in ("CancelledError", "GeneratorExit") else "error"
+                raise
+            finally:
+                telemetry.record(name, time.perf_counter() - started, outcome)
+        return async_gen_wrapper
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            async with telemetry.span(name):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with telemetry.span(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """
+    Serves /metrics (Prometheus text), /metrics.json and /traces.json from a daemon thread.
+
+    Returns:
+        The running `ThreadingHTTPServer`.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = telemetry.render_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                snapshot = telemetry.snapshot()
+                snapshot.pop("traces")
+                body, content_type = json.dumps(snapshot).encode("utf-8"), "application/json"
+            elif self.path == "/traces.json":
+                body, content_type = json.dumps(telemetry.snapshot()["traces"]).encode("utf-8"), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="daedalus-metrics", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return server
+
+
+telemetry = Telemetry()
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from google.genai import types
+from .workers import worker_pool, LoopLocal
+from .telemetry import telemetry
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+TEMPLATE_YEAR = 2026
+MONTHS = 12
+
+# Supported aspect ratios, as passed to the image model
+ASPECT_RATIOS = ("9:16", "3:4", "4:3")
+
+# Longest edge of the template payload sent with each image request.
+# The template only guides layout, so it never needs to be larger than the
+# source file; smaller targets get a smaller (cheaper) upload.
+PAYLOAD_LONG_EDGE = {
+    # Draft previews only need the rough layout
+    "preview": 512,
+    "1K": 1024,
+    "2K": 2048,
+    "4K": 4096,
+}
+
+# Relative pixel scale of each output resolution offered by the image model
+RESOLUTION_SCALE = {
+    "1K": 1,
+    "2K": 2,
+    "4K": 4,
+}
+
+PAYLOAD_MIME_TYPE = "image/jpeg"
+PAYLOAD_QUALITY = int(os.environ.get("DAEDALUS_TEMPLATE_QUALITY", "90"))
+MAX_CACHE_BYTES = int(os.environ.get("DAEDALUS_TEMPLATE_CACHE_MB", "64")) * 1024 * 1024
+
+
+class TemplatePayload:
+    """An encoded, ready-to-upload calendar template for one month."""
+
+    __slots__ = ("data", "mime_type", "sha256", "size", "part")
+
+    def __init__(self, data: bytes, mime_type: str, size: tuple):
+        self.data = data
+        self.mime_type = mime_type
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.size = size
+        self.part = types.Part.from_bytes(data=data, mime_type=mime_type)
+
+
+class TemplateStore:
+    """
+    Process-wide store of calendar templates.
+
+    Each aspect ratio set is validated once and each (aspect ratio, resolution)
+    set is decoded, downscaled and re-encoded once, then shared by every
+    session. Encoded sets are kept in an LRU bounded by total payload bytes.
+    """
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.templates_dir = Path(templates_dir)
+        self.max_bytes = max_bytes
+        self._sets: "OrderedDict[tuple, list[TemplatePayload]]" = OrderedDict()
+        self._bytes = 0
+        self._validated: dict = {}
+        # Per event loop: {(aspect ratio, resolution): asyncio.Lock}
+        self._locks = LoopLocal(dict)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def template_path(self, aspect_ratio: str, month: int) -> Path:
+        """Returns the source template file for a month (1-12)."""
+        return self.templates_dir / aspect_ratio.replace(":", "_") / f"{month}-{TEMPLATE_YEAR}.png"
+
+    def validate(self, aspect_ratio: str) -> tuple:
+        """
+        Checks that all twelve templates of an aspect ratio exist and share one size.
+
+        Args:
+            aspect_ratio: The aspect ratio of the template set (e.g., "9:16").
+
+        Returns:
+            tuple: The (width, height) of the templates.
+
+        Raises:
+            ValueError: If the aspect ratio is unsupported or the set is inconsistent.
+            FileNotFoundError: If a template file is missing.
+        """
+        if aspect_ratio in self._validated:
+            return self._validated[aspect_ratio]
+        if aspect_ratio not in ASPECT_RATIOS:
+            raise ValueError(f"Unsupported aspect ratio: {aspect_ratio}. Supported: {', '.join(ASPECT_RATIOS)}")
+
+        from PIL import Image
+
+        sizes = set()
+        for month in range(1, MONTHS + 1):
+            path = self.template_path(aspect_ratio, month)
+            if not path.exists():
+                raise FileNotFoundError(f"Template file not found at {path}")
+            with Image.open(path) as image:
+                sizes.add(image.size)
+        if len(sizes) != 1:
+            raise ValueError(f"Templates for {aspect_ratio} have mixed sizes: {sorted(sizes)}")
+
+        size = sizes.pop()
+        self._validated[aspect_ratio] = size
+        logger.info(f"Validated {MONTHS} templates for {aspect_ratio} ({size[0]}x{size[1]})")
+        return size
+
+    def _set_key(self, aspect_ratio: str, resolution: str) -> tuple:
+        # Resolutions whose payload would be capped at the source size share one set
+        if resolution not in PAYLOAD_LONG_EDGE:
+            raise ValueError(f"Unsupported resolution: {resolution}. Supported: {', '.join(PAYLOAD_LONG_EDGE)}")
+        size = self.validate(aspect_ratio)
+        return (aspect_ratio, min(PAYLOAD_LONG_EDGE[resolution], max(size)))
+
+    def _encode_month(self, aspect_ratio: str, long_edge: int, month: int) -> TemplatePayload:
+        from PIL import Image
+
+        with Image.open(self.template_path(aspect_ratio, month)) as image:
+            # Templates are fully opaque, so alpha only costs bytes
+            image = image.convert("RGB")
+            if max(image.size) > long_edge:
+                image.thumbnail((long_edge, long_edge), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=PAYLOAD_QUALITY, optimize=True)
+            return TemplatePayload(buffer.getvalue(), PAYLOAD_MIME_TYPE, image.size)
+
+    def load(self, aspect_ratio: str, resolution: str) -> list:
+        """
+        Synchronously builds (or returns) the payload set for an aspect ratio and resolution.
+
+        Returns:
+            list[TemplatePayload]: Twelve payloads, January first.
+        """
+        key = self._set_key(aspect_ratio, resolution)
+        with self._lock:
+            if key in self._sets:
+                self._sets.move_to_end(key)
+                self.hits += 1
+                return self._sets[key]
+            self.misses += 1
+
+        payloads = [self._encode_month(aspect_ratio, key[1], month) for month in range(1, MONTHS + 1)]
+        set_bytes = sum(len(p.data) for p in payloads)
+
+        with self._lock:
+            if key not in self._sets:
+                self._sets[key] = payloads
+                self._bytes += set_bytes
+                self._evict()
+        logger.info(f"Loaded templates for {aspect_ratio} @ {key[1]}px: {set_bytes / 1024:.0f} KiB")
+        return payloads
+
+    def _evict(self):
+        # Never evict the set that was just inserted
+        while self._bytes > self.max_bytes and len(self._sets) > 1:
+            old_key, old_set = self._sets.popitem(last=False)
+            self._bytes -= sum(len(p.data) for p in old_set)
+            self.evictions += 1
+            logger.info(f"Evicted templates for {old_key[0]} @ {old_key[1]}px")
+
+    async def get_payloads(self, aspect_ratio: str, resolution: str) -> list:
+        """
+        Returns the payload set for an aspect ratio and resolution, loading it off the event loop.
+
+        Concurrent callers for the same set share a single load.
+        """
+        if aspect_ratio in self._validated:
+            key = self._set_key(aspect_ratio, resolution)
+            with self._lock:
+                cached = self._sets.get(key)
+                if cached is not None:
+                    self._sets.move_to_end(key)
+                    self.hits += 1
+                    return cached
+        lock = self._locks.get().setdefault((aspect_ratio, resolution), asyncio.Lock())
+        async with telemetry.span("templates.load", aspect_ratio=aspect_ratio, resolution=resolution):
+            async with lock:
+                # Thread pool: the loaded set is kept in this process's memory
+                return await worker_pool.run_io(self.load, aspect_ratio, resolution)
+
+    def preload(self, resolutions=("1K",)):
+        """Validates every aspect ratio and loads the given resolutions (e.g. at startup)."""
+        for aspect_ratio in ASPECT_RATIOS:
+            for resolution in resolutions:
+                self.load(aspect_ratio, resolution)
+
+    def stats(self) -> dict:
+        """Returns cache counters and memory accounting."""
+        with self._lock:
+            return {
+                "sets": len(self._sets),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+template_store = TemplateStore()
+telemetry.register_stats("template_store", template_store.stats)
@@ -0,0 +1,240 @@
+import asyncio
+import contextlib
+import functools
+import io
+import os
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from .telemetry import telemetry
+import logging
+
+logger = logging.getLogger(__name__)
+
+# "thread" or "process"; only used for CPU-bound work such as image encoding
+CPU_POOL_KIND = os.environ.get("DAEDALUS_CPU_POOL", "thread")
+CPU_WORKERS = int(os.environ.get("DAEDALUS_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+IO_WORKERS = int(os.environ.get("DAEDALUS_IO_WORKERS", "8"))
+# Callers beyond this many queued jobs wait before submitting (back-pressure)
+MAX_PENDING = int(os.environ.get("DAEDALUS_POOL_MAX_PENDING", "64"))
+
+# "original" keeps the bytes returned by the model, "png" re-encodes as
+# optimized PNG and "webp" as lossless WebP
+OUTPUT_FORMAT = os.environ.get("DAEDALUS_OUTPUT_FORMAT", "original")
+
+# Longest edge of the JPEG previews shown in chat
+THUMBNAIL_EDGE = int(os.environ.get("DAEDALUS_THUMBNAIL_EDGE", "384"))
+THUMBNAIL_MIME_TYPE = "image/jpeg"
+
+OUTPUT_FORMATS = {
+    "png": ("PNG", "image/png", ".png", {"optimize": True}),
+    "webp": ("WEBP", "image/webp", ".webp", {"lossless": True, "method": 4}),
+}
+MIME_EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+}
+
+
+def output_extension(mime_type: str) -> str:
+    """Returns the file extension for an image mime type."""
+    return MIME_EXTENSIONS.get(mime_type, ".png")
+
+
+def encode_image(data: bytes, mime_type: str, output_format: str = OUTPUT_FORMAT) -> tuple:
+    """
+    Re-encodes image bytes into the configured output format.
+
+    Args:
+        data: The encoded source image.
+        mime_type: The mime type of `data`.
+        output_format: One of "original", "png" or "webp".
+
+    Returns:
+        tuple: (encoded bytes, mime type).
+    """
+    if output_format not in OUTPUT_FORMATS:
+        return data, mime_type
+
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return _save_image(image, output_format)
+
+
+def _save_image(image, output_format: str) -> tuple:
+    # Derived images have no "original" bytes to keep, so they fall back to PNG
+    pil_format, mime_type, _, options = OUTPUT_FORMATS.get(output_format, OUTPUT_FORMATS["png"])
+    buffer = io.BytesIO()
+    image.save(buffer, format=pil_format, **options)
+    return buffer.getvalue(), mime_type
+
+
+def derive_images(data: bytes, scales: dict, output_format: str = OUTPUT_FORMAT, thumbnail_edge: int = THUMBNAIL_EDGE) -> tuple:
+    """
+    Derives smaller deliverables and a chat preview from one rendered image.
+
+    The source is decoded once; every variant is resampled from the full-size
+    pixels with Lanczos filtering.
+
+    Args:
+        data: The encoded full-size image.
+        scales: Mapping of variant name (e.g. "1K") to scale factor relative to the source.
+        output_format: Encoding for the variants, see `encode_image`.
+        thumbnail_edge: Longest edge of the JPEG preview.
+
+    Returns:
+        tuple: ({variant name: (bytes, mime type)}, preview JPEG bytes).
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        variants = {}
+        for name, scale in scales.items():
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            variants[name] = _save_image(image.resize(size, Image.LANCZOS), output_format)
+
+        preview = image.convert("RGB")
+        preview.thumbnail((thumbnail_edge, thumbnail_edge), Image.LANCZOS)
+        buffer = io.BytesIO()
+        preview.save(buffer, format="JPEG", quality=80, optimize=True)
+    return variants, buffer.getvalue()
+
+
+@contextlib.contextmanager
+def replacing(path):
+    """
+    Yields a temporary path next to `path` that replaces `path` once the block succeeds.
+
+    Every writer gets its own temporary file, so concurrent writers of the same
+    path (e.g. a duplicated tool call) never write into each other's file; the
+    last one to finish wins. Parent folders are created as needed.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    # mkstemp creates owner-only files; outputs are regular, shareable files
+    os.chmod(tmp_path, 0o644)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_bytes(path, data: bytes):
+    """Atomically writes `data` to `path`, creating parent folders as needed."""
+    # Replace rather than overwrite, outputs may be hard-linked into other jobs
+    with replacing(path) as tmp_path:
+        tmp_path.write_bytes(data)
+
+
+class LoopLocal:
+    """
+    One instance of an asyncio primitive (or a dict of them) per running event loop.
+
+    Locks, semaphores and futures belong to the loop they were first used on,
+    so process-wide singletons keep theirs per loop, like `clients.get_client`.
+    Entries go away with their loop.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._by_loop = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the running loop's instance, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._by_loop.get(loop)
+            if value is None:
+                value = self._by_loop[loop] = self._factory()
+            return value
+
+
+class WorkerPool:
+    """
+    Bounded executors for blocking work done on behalf of async tools.
+
+    File system work runs on a thread pool; CPU-bound work (PIL decode/encode)
+    runs on a thread or process pool depending on DAEDALUS_CPU_POOL. Functions
+    sent to a process pool must be module-level. Both share one back-pressure
+    limit (per event loop) so a burst of orders queues here instead of piling
+    work onto the executors.
+    """
+
+    def __init__(
+        self,
+        cpu_kind: str = CPU_POOL_KIND,
+        cpu_workers: int = CPU_WORKERS,
+        io_workers: int = IO_WORKERS,
+        max_pending: int = MAX_PENDING,
+    ):
+        self.cpu_kind = cpu_kind
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+        self.max_pending = max_pending
+        self._cpu_executor = None
+        self._io_executor = None
+        self._slots = LoopLocal(lambda: asyncio.Semaphore(self.max_pending))
+        self.pending = 0
+
+    def _slots_for_loop(self) -> asyncio.Semaphore:
+        return self._slots.get()
+
+    def _cpu(self):
+        if self._cpu_executor is None:
+            if self.cpu_kind == "process":
+                self._cpu_executor = ProcessPoolExecutor(max_workers=self.cpu_workers)
+            else:
+                self._cpu_executor = ThreadPoolExecutor(max_workers=self.cpu_workers, thread_name_prefix="daedalus-cpu")
+            logger.info(f"Started {self.cpu_kind} CPU pool with {self.cpu_workers} workers")
+        return self._cpu_executor
+
+    def _io(self):
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="daedalus-io")
+        return self._io_executor
+
+    async def _submit(self, executor, fn, *args, **kwargs):
+        async with self._slots_for_loop():
+            self.pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+            finally:
+                self.pending -= 1
+
+    async def run_io(self, fn, *args, **kwargs):
+        """Runs blocking file system work off the event loop."""
+        return await self._submit(self._io(), fn, *args, **kwargs)
+
+    async def run_cpu(self, fn, *args, **kwargs):
+        """Runs CPU-bound work (e.g. image encoding) off the event loop."""
+        return await self._submit(self._cpu(), fn, *args, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "cpu_kind": self.cpu_kind,
+            "cpu_workers": self.cpu_workers,
+            "io_workers": self.io_workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+        }
+
+    def shutdown(self):
+        for executor in (self._cpu_executor, self._io_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._cpu_executor = self._io_executor = None
+
+
+worker_pool = WorkerPool()
+telemetry.register_stats("worker_pool", worker_pool.stats)
@@ -0,0 +1,44 @@
+import pytest
+
+from daedalus.src import agent_tools
+from daedalus.src.backend import FakeBackend, set_backend
+from daedalus.src.prompt_cache import PromptSetCache
+from daedalus.src.result_cache import image_cache
+from daedalus.src.scheduler import ImageRequestScheduler
+
+
+class FakeToolContext:
+    """Just enough of ADK's ToolContext for the Daedalus tools; keeps saved artifacts in memory."""
+
+    def __init__(self, user_id: str = "test-user"):
+        self.user_id = user_id
+        self.invocation_id = f"{user_id}-order"
+        self.state = {}
+        self.artifacts = {}
+
+    async def save_artifact(self, filename: str, artifact) -> int:
+        versions = self.artifacts.setdefault(filename, [])
+        versions.append(artifact.inline_data.data)
+        return len(versions) - 1
+
+
+@pytest.fixture
+def backend():
+    """A fast, deterministic FakeBackend installed as the process-wide backend."""
+    fake = FakeBackend(image_latency=0.01, prompt_latency=0.01, latency_sigma=0.0, seed=7)
+    set_backend(fake)
+    yield fake
+    set_backend(None)
+
+
+@pytest.fixture
+def isolated_store(tmp_path, monkeypatch):
+    """Runs a test with job folders, the image cache and the prompt cache under tmp_path."""
+    # Job folders are created relative to DAEDALUS_OUTPUT_DIR, "." by default
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(image_cache, "cache_dir", tmp_path / "cache" / "images")
+    monkeypatch.setattr(image_cache, "_index", None)
+    monkeypatch.setattr(image_cache, "_bytes", 0)
+    monkeypatch.setattr(agent_tools, "prompt_cache", PromptSetCache(tmp_path / "cache" / "prompts.json"))
+    monkeypatch.setattr(agent_tools, "image_scheduler", ImageRequestScheduler(max_concurrency=8, rate=1000, burst=1000))
+    return tmp_path
@@ -0,0 +1,154 @@
+import asyncio
+
+from google.adk.events.event import Event
+
+from daedalus.src import agent_tools
+from daedalus.src.jobs import CalendarJob
+from daedalus.tests.conftest import FakeToolContext
+
+
+async def _collect(items) -> tuple:
+    """Returns (yielded events, final message) of a generator tool."""
+    events, message = [], None
+    async for item in items:
+        if isinstance(item, Event):
+            events.append(item)
+        else:
+            message = item
+    return events, message
+
+
+def test_generate_prompts_repairs_missing_months(backend, isolated_store):
+    backend.prompt_defect_rate = 0.5
+    ctx = FakeToolContext()
+    prompts = asyncio.run(agent_tools.generate_prompts("monsoon", ctx))
+    assert len(prompts) == 12
+    assert all(prompt.startswith("Edit this image") for prompt in prompts)
+    assert backend.prompt_calls == 1
+    assert backend.repair_calls >= 1
+    assert ctx.state["user:prompts"] == prompts
+
+
+def test_generate_calendar_delivers_each_month_as_an_event(backend, isolated_store):
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.generate_prompts("beach", ctx))
+
+    events, message = asyncio.run(_collect(agent_tools.generate_calendar("9:16", "1K", ctx)))
+    assert "successfully" in message
+    month_events = [event for event in events if event.actions.artifact_delta]
+    delivered = [name for event in month_events for name in event.actions.artifact_delta]
+    assert sorted(int(name.split("-")[0]) for name in delivered if name.endswith("-2026.png")) == list(range(1, 13))
+    assert ctx.state["user:calendar_progress"]["completed"] == list(range(1, 13))
+    assert backend.image_calls == 12
+
+
+def test_generate_calendar_resumes_without_rendering_again(backend, isolated_store):
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.generate_prompts("beach", ctx))
+    asyncio.run(_collect(agent_tools.generate_calendar("9:16", "1K", ctx)))
+
+    # Lose one month on disk, as after a crash
+    job = CalendarJob.load(ctx.state["user:calendar_job"])
+    job.output_path(5).unlink()
+
+    _, message = asyncio.run(_collect(agent_tools.generate_calendar("9:16", "1K", ctx)))
+    assert "Months [5]" in message
+    # Month 5 comes from the image cache; nothing reaches the model again
+    assert backend.image_calls == 12
+
+
+def test_regenerate_months_pairs_edits_with_months_in_order(backend, isolated_store):
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.generate_prompts("beach", ctx))
+    asyncio.run(_collect(agent_tools.generate_calendar("9:16", "1K", ctx)))
+    calls = backend.image_calls
+
+    _, message = asyncio.run(_collect(agent_tools.regenerate_months(
+        [3, 1], ctx, prompt_edits=["Edit this image: March edit", "Edit this image: January edit"]
+    )))
+    assert "Months [1, 3]" in message
+    job = CalendarJob.load(ctx.state["user:calendar_job"])
+    assert job.month(1)["prompt"] == "Edit this image: January edit"
+    assert job.month(3)["prompt"] == "Edit this image: March edit"
+    assert backend.image_calls == calls + 2
+
+
+def test_regenerate_months_rejects_duplicate_months_with_edits(backend, isolated_store):
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.generate_prompts("beach", ctx))
+    asyncio.run(_collect(agent_tools.generate_calendar("9:16", "1K", ctx)))
+
+    events, message = asyncio.run(_collect(agent_tools.regenerate_months(
+        [2, 2], ctx, prompt_edits=["Edit this image: a", "Edit this image: b"]
+    )))
+    assert events == []
+    assert message.startswith("Error:")
+
+
+def test_bulk_order_leaves_the_session_prompts_alone(backend, isolated_store):
+    from daedalus.src import bulk
+
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.generate_prompts("beach", ctx))
+    ctx.state["user:preview"] = {"months": [1]}
+    session_prompts = ctx.state["user:prompts"]
+
+    events, message = asyncio.run(_collect(bulk.generate_bulk_order("Diwali", ["Asha"], "9:16", "1K", ctx)))
+    assert not message.startswith("Error")
+    # The initial and the final checkpoint at least
+    assert len(events) >= 2
+    assert ctx.state["user:bulk_progress"]["done"] == ctx.state["user:bulk_progress"]["unique_renders"]
+    assert ctx.state["user:prompts"] == session_prompts
+    assert ctx.state["user:preview"] == {"months": [1]}
+    assert backend.prompt_calls == 2
+
+
+def test_concurrent_runs_of_one_order_agree_on_the_manifest(backend, isolated_store):
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.generate_prompts("beach", ctx))
+
+    async def twice():
+        # A duplicated tool call for the same order
+        return await asyncio.gather(
+            _collect(agent_tools.generate_calendar("9:16", "1K,2K", ctx)),
+            _collect(agent_tools.generate_calendar("9:16", "1K,2K", ctx)),
+        )
+
+    results = asyncio.run(twice())
+    assert all("error" not in message.lower() for _, message in results)
+    job = CalendarJob.load(ctx.state["user:calendar_job"])
+    assert job.done_months() == list(range(1, 13))
+    assert job.pending_months() == []
+    assert not list(job.folder.rglob("*.tmp"))
+
+
+def test_preview_calendar_renders_a_few_months_and_keeps_edits(backend, isolated_store):
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.generate_prompts("beach", ctx))
+
+    message = asyncio.run(agent_tools.preview_calendar("9:16", ctx))
+    assert "[1, 7, 12]" in message
+    assert sorted(ctx.artifacts) == ["preview-1-2026.png", "preview-12-2026.png", "preview-7-2026.png"]
+    assert backend.image_calls == 3
+
+    edit = "Edit this image: a kite festival"
+    asyncio.run(agent_tools.preview_calendar("9:16", ctx, months=[6], prompt_edits=[edit]))
+    preview = ctx.state["user:preview"]
+    assert preview["months"] == [6]
+    assert preview["prompts"] == {"6": edit}
+    # The full render uses the approved prompt verbatim
+    assert ctx.state["user:prompts"][5] == edit
+
+
+def test_preview_calendar_needs_prompts(backend, isolated_store):
+    message = asyncio.run(agent_tools.preview_calendar("9:16", FakeToolContext()))
+    assert message.startswith("Error:")
+    assert backend.image_calls == 0
+
+
+def test_month_names_get_a_clear_error(backend, isolated_store):
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.generate_prompts("beach", ctx))
+    message = asyncio.run(agent_tools.preview_calendar("9:16", ctx, months=["March"]))
+    assert message == "Error: Months must be numbers from 1 (January) to 12 (December)."
+    assert backend.image_calls == 0
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from google.genai import errors
+
+from daedalus.src.backend import FakeBackend
+
+
+def _fake(**kwargs) -> FakeBackend:
+    return FakeBackend(prompt_latency=0.0, latency_sigma=0.0, retry_after=0.0, seed=1, **kwargs)
+
+
+def test_prompt_calls_retry_transient_errors(monkeypatch):
+    backend = _fake()
+    failures = [errors.ClientError(429, {"error": {"code": 429}}), errors.ServerError(500, {"error": {"code": 500}})]
+
+    async def maybe_fail(timeouts: bool = True):
+        assert not timeouts
+        if failures:
+            raise failures.pop(0)
+
+    monkeypatch.setattr(backend, "_maybe_fail", maybe_fail)
+    result = asyncio.run(backend.generate_prompts("beach", None))
+    assert len(result["prompts"]) == 12
+    assert backend.prompt_calls == 1
+
+
+def test_prompt_calls_give_up_like_the_sdk():
+    backend = _fake(rate_429=1.0)
+    with pytest.raises(errors.ClientError):
+        asyncio.run(backend.repair_prompts("beach", [3], {}, None))
+
+
+def test_prompt_calls_never_time_out():
+    backend = _fake(timeout_rate=1.0, timeout_seconds=60.0)
+    result = asyncio.run(asyncio.wait_for(backend.generate_prompts("beach", None), 5))
+    assert len(result["prompts"]) == 12
@@ -0,0 +1,36 @@
+import asyncio
+import weakref
+
+from daedalus.src import clients
+
+
+class FakeClient:
+    pass
+
+
+def test_one_client_per_event_loop(monkeypatch):
+    built = []
+
+    def build():
+        built.append(FakeClient())
+        return built[-1]
+
+    monkeypatch.setattr(clients, "_build_client", build)
+    monkeypatch.setattr(clients, "_clients", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(clients, "_sync_client", None)
+
+    async def get_concurrently():
+        async def get():
+            await asyncio.sleep(0)
+            return clients.get_client()
+
+        return await asyncio.gather(*(get() for _ in range(5)))
+
+    first = asyncio.run(get_concurrently())
+    assert all(client is first[0] for client in first)
+    second = asyncio.run(get_concurrently())
+    assert second[0] is not first[0]
+
+    # Callers outside any loop share one more client
+    assert clients.get_client() is clients.get_client()
+    assert len(built) == 3
@@ -0,0 +1,85 @@
+import json
+
+from daedalus.src.jobs import CalendarJob, DONE, PENDING
+
+PROMPTS = [f"Edit this image: month {month}" for month in range(1, 13)]
+
+
+def _finish(job: CalendarJob, month: int, data: bytes = None):
+    data = data or f"image {month}".encode()
+    job.output_path(month).write_bytes(data)
+    job.mark_done(month, data)
+
+
+def test_same_order_resumes_the_same_job(tmp_path):
+    job = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    _finish(job, 1)
+    _finish(job, 2)
+
+    resumed = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    assert resumed.job_id == job.job_id
+    assert resumed.folder == tmp_path / f"output_{job.job_id}"
+    assert resumed.pending_months() == list(range(3, 13))
+
+
+def test_other_orders_get_other_jobs(tmp_path):
+    job = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    assert CalendarJob.open("other", PROMPTS, "9:16", "1K", output_dir=tmp_path).job_id != job.job_id
+    assert CalendarJob.open("user", PROMPTS, "9:16", "2K", output_dir=tmp_path).job_id != job.job_id
+
+
+def test_missing_or_changed_outputs_are_pending_again(tmp_path):
+    job = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    for month in (1, 2, 3):
+        _finish(job, month)
+    job.output_path(1).unlink()
+    job.output_path(2).write_bytes(b"tampered")
+    assert job.pending_months() == [1, 2] + list(range(4, 13))
+
+
+def test_manifest_is_written_atomically(tmp_path):
+    job = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    _finish(job, 5)
+    with open(job.folder / "manifest.json", encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["months"]["5"]["status"] == DONE
+    assert not (job.folder / "manifest.json.tmp").exists()
+    assert CalendarJob.load(job.job_id, output_dir=tmp_path).month(5)["status"] == DONE
+
+
+def test_adopt_copies_only_months_with_unchanged_prompts(tmp_path):
+    previous = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    for month in (1, 2, 3):
+        _finish(previous, month)
+
+    edited = list(PROMPTS)
+    edited[1] = "Edit this image: a new February"
+    job = CalendarJob.open("user", edited, "9:16", "1K", output_dir=tmp_path)
+    job.adopt(previous)
+
+    assert job.done_months() == [1, 3]
+    assert job.month(2)["status"] == PENDING
+    assert job.output_path(1).read_bytes() == b"image 1"
+    assert job.pending_months() == [2] + list(range(4, 13))
+
+
+def test_reset_with_new_variant(tmp_path):
+    job = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    _finish(job, 4)
+    job.reset(4, new_variant=True)
+    assert job.month(4)["status"] == PENDING
+    assert job.month(4)["variant"] == 1
+
+
+def test_runs_of_one_job_share_its_manifest(tmp_path):
+    first = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    second = CalendarJob.open("user", PROMPTS, "9:16", "1K", output_dir=tmp_path)
+    assert second is first
+    assert CalendarJob.load(first.job_id, output_dir=tmp_path) is first
+
+    _finish(first, 1)
+    second.mark_failed(2, RuntimeError("timed out"))
+    with open(first.folder / "manifest.json", encoding="utf-8") as f:
+        months = json.load(f)["months"]
+    assert months["1"]["status"] == DONE
+    assert months["2"]["status"] == "failed"
@@ -0,0 +1,62 @@
+import re
+import zipfile
+
+from PIL import Image
+
+from daedalus.src.packaging import build_pdf, build_zip
+
+
+def _images(tmp_path, count: int) -> list:
+    paths = []
+    for index in range(count):
+        path = tmp_path / f"{index + 1}-2026.png"
+        Image.new("RGBA" if index % 2 else "RGB", (60, 90), (index * 20, 100, 200)).save(path)
+        paths.append(path)
+    return paths
+
+
+def test_pdf_cross_reference_table_points_at_every_object(tmp_path):
+    images = _images(tmp_path, 3)
+    target = tmp_path / "calendar.pdf"
+    size = build_pdf(images, target, dpi=300, quality=80)
+
+    data = target.read_bytes()
+    assert size == len(data)
+    assert data.startswith(b"%PDF-1.4")
+    assert data.rstrip().endswith(b"%%EOF")
+
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF", data).group(1))
+    assert data[startxref:].startswith(b"xref\n")
+    header = re.match(rb"xref\n0 (\d+)\n", data[startxref:])
+    count = int(header.group(1))
+    entries = data[startxref + header.end():].split(b"\n")[:count]
+    assert entries[0] == b"0000000000 65535 f "
+    for obj_id, entry in enumerate(entries[1:], start=1):
+        offset = int(entry[:10])
+        assert data[offset:].startswith(f"{obj_id} 0 obj\n".encode("ascii")), obj_id
+
+    trailer = re.search(rb"/Size (\d+) /Root (\d+) 0 R", data)
+    assert int(trailer.group(1)) == count
+    assert b"/Count 3" in data
+    # Pages are sized to print at the requested resolution: 60 px at 300 dpi is 14.4 pt
+    assert b"/MediaBox [0 0 14.40 21.60]" in data
+
+
+def test_pdf_stream_lengths_match(tmp_path):
+    target = tmp_path / "calendar.pdf"
+    build_pdf(_images(tmp_path, 2), target)
+    data = target.read_bytes()
+    for match in re.finditer(rb"/Length (\d+) 0 R >>\nstream\n", data):
+        length_id = int(match.group(1))
+        length = int(re.search(rf"\n{length_id} 0 obj\n(\d+)\nendobj".encode("ascii"), data).group(1))
+        assert data[match.end() + length:].startswith(b"\nendstream")
+
+
+def test_zip_contains_every_file_under_its_name(tmp_path):
+    images = _images(tmp_path, 2)
+    target = tmp_path / "calendar.zip"
+    build_zip([(path, f"month-{path.name}") for path in images], target)
+    with zipfile.ZipFile(target) as archive:
+        assert archive.namelist() == [f"month-{path.name}" for path in images]
+        assert archive.read(f"month-{images[0].name}") == images[0].read_bytes()
+    assert not (tmp_path / "calendar.zip.tmp").exists()
@@ -0,0 +1,63 @@
+import types
+
+from daedalus.src import prompt_cache as prompt_cache_module
+from daedalus.src.prompt_cache import PromptSetCache, normalize_theme
+
+PROMPTS = [f"Edit this image: month {month}" for month in range(1, 13)]
+
+
+def test_normalized_themes_are_shared_between_users(tmp_path):
+    cache = PromptSetCache(tmp_path / "prompts.json")
+    assert normalize_theme("The Star-Wars theme!") == normalize_theme("star wars") == "star wars"
+    assert cache.put("Star Wars", PROMPTS, user_id="alice")
+    assert cache.get("the star-wars theme", user_id="bob") == (PROMPTS, "star wars", 1.0)
+    assert not cache.put("Star Wars", PROMPTS[:11])
+
+
+def test_fuzzy_hits_are_only_served_to_the_same_user(tmp_path):
+    cache = PromptSetCache(tmp_path / "prompts.json", similarity=0.5)
+    cache.put("Diwali festival lights", PROMPTS, user_id="alice")
+
+    assert cache.get("Diwali lights", user_id="bob") is None
+    assert cache.get("Diwali lights") is None
+    prompts, key, score = cache.get("Diwali lights", user_id="alice")
+    assert (prompts, key) == (PROMPTS, "diwali festival lights")
+    assert 0.5 <= score < 1.0
+    assert cache.stats()["fuzzy_hits"] == 1
+
+    # Another user storing the same set makes it theirs too
+    cache.put("Diwali festival lights", PROMPTS, user_id="bob")
+    assert cache.get("Diwali lights", user_id="bob") is not None
+    # A different set for the theme drops the earlier users
+    replacement = [prompt + " with fireworks" for prompt in PROMPTS]
+    cache.put("Diwali festival lights", replacement, user_id="carol")
+    assert cache.get("Diwali lights", user_id="alice") is None
+
+
+def test_excluded_set_is_a_miss(tmp_path):
+    cache = PromptSetCache(tmp_path / "prompts.json")
+    cache.put("beach", PROMPTS)
+    assert cache.get("beach", exclude=PROMPTS) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_and_least_recently_used_entries_go(tmp_path, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(prompt_cache_module, "time", types.SimpleNamespace(time=lambda: now))
+    cache = PromptSetCache(tmp_path / "prompts.json", max_entries=2, ttl=60)
+    cache.put("beach", PROMPTS)
+    cache.put("forest", PROMPTS)
+    cache.get("beach")
+    cache.put("desert", PROMPTS)
+    assert cache.get("forest") is None
+    assert cache.stats()["evictions"] == 1
+
+    now += 61
+    assert cache.get("beach") is None
+    # Expiry is persisted
+    assert PromptSetCache(tmp_path / "prompts.json", ttl=60).get("beach") is None
+
+
+def test_entries_survive_a_restart(tmp_path):
+    PromptSetCache(tmp_path / "prompts.json").put("monsoon", PROMPTS, user_id="alice")
+    assert PromptSetCache(tmp_path / "prompts.json").get("Monsoon") == (PROMPTS, "monsoon", 1.0)
@@ -0,0 +1,49 @@
+import json
+
+from daedalus.src.prompts import missing_months, parse_prompt_output, validate_prompts
+
+PROMPTS = [f"Edit this image: month {month}" for month in range(1, 13)]
+
+
+def test_structured_output():
+    raw = {"prompts": [{"month": month, "prompt": prompt} for month, prompt in enumerate(PROMPTS, start=1)]}
+    assert parse_prompt_output(raw) == dict(enumerate(PROMPTS, start=1))
+
+
+def test_list_in_code_block():
+    raw = "```python\n" + repr(PROMPTS) + "\n```"
+    assert parse_prompt_output(raw) == dict(enumerate(PROMPTS, start=1))
+
+
+def test_json_text():
+    raw = json.dumps({"prompts": [{"month": 3, "prompt": PROMPTS[2]}]})
+    assert parse_prompt_output(raw) == {3: PROMPTS[2]}
+
+
+def test_bad_entries_are_dropped_and_missing_openings_fixed():
+    raw = {"prompts": [
+        {"month": 1, "prompt": "edit this image: snow"},
+        {"month": 2, "prompt": "Add hearts around the dates"},
+        {"month": 2, "prompt": "Edit this image: duplicate"},
+        {"month": 13, "prompt": "Edit this image: out of range"},
+        {"month": "4", "prompt": "Edit this image: not a number"},
+        {"month": 5, "prompt": "   "},
+        {"month": 6},
+    ]}
+    by_month = parse_prompt_output(raw)
+    assert by_month == {
+        1: "Edit this image: snow",
+        2: "Edit this image: add hearts around the dates",
+    }
+    assert missing_months(by_month) == list(range(3, 13))
+
+
+def test_unparseable_output():
+    assert parse_prompt_output("Sorry, I can't help with that.") == {}
+    assert parse_prompt_output(None) == {}
+
+
+def test_validate_prompts():
+    assert validate_prompts(PROMPTS)
+    assert not validate_prompts(PROMPTS[:11])
+    assert not validate_prompts(PROMPTS[:11] + ["Make it pink"])
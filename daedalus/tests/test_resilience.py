@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from daedalus.src.resilience import CircuitBreaker, CircuitOpenError, HedgeBudget, LatencyTracker, hedged_call
+
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    options = dict(window=4, failure_ratio=0.5, cooldown=30, min_calls=4)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def _fail(breaker: CircuitBreaker, times: int):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.on_failure(TimeoutError("upstream timed out"))
+
+
+def test_opens_after_enough_upstream_failures():
+    breaker = _breaker()
+    breaker.before_call()
+    breaker.on_success()
+    _fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    _fail(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+
+def test_client_errors_do_not_open_it():
+    breaker = _breaker()
+    for _ in range(10):
+        breaker.before_call()
+        breaker.on_failure(ValueError("bad request"))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_closes_it(monkeypatch):
+    breaker = _breaker(cooldown=0)
+    _fail(breaker, 4)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.on_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_it():
+    breaker = _breaker(cooldown=0)
+    _fail(breaker, 4)
+    breaker.before_call()
+    breaker.on_failure(TimeoutError("still down"))
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_stays_open_during_cooldown():
+    breaker = _breaker(cooldown=60)
+    _fail(breaker, 4)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    # A call that started before the circuit opened does not close it
+    breaker.on_success()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_timeout_follows_observed_latency():
+    tracker = LatencyTracker(min_samples=5)
+    default = tracker.timeout("1K")
+    for _ in range(10):
+        tracker.observe("1K", 20.0)
+    assert tracker.timeout("1K") == 40.0
+    assert tracker.timeout("4K") == default
+    assert tracker.hedge_delay("1K") == 20.0
+
+
+def test_hedge_wins_when_primary_is_slow():
+    async def scenario():
+        async def slow():
+            await asyncio.sleep(1)
+            return "primary"
+
+        async def fast():
+            return "hedge"
+
+        return await hedged_call(slow, fast, 0.01, HedgeBudget(ratio=1.0, burst=1))
+
+    assert asyncio.run(scenario()) == ("hedge", True)
+
+
+def test_no_hedge_without_budget():
+    async def scenario():
+        async def slow():
+            await asyncio.sleep(0.03)
+            return "primary"
+
+        async def fast():
+            return "hedge"
+
+        budget = HedgeBudget(ratio=0.0)
+        return await hedged_call(slow, fast, 0.01, budget), budget.denied
+
+    assert asyncio.run(scenario()) == (("primary", False), 1)
+
+
+def test_hung_calls_do_not_raise_the_timeout():
+    tracker = LatencyTracker()
+    for _ in range(198):
+        tracker.observe("1K", 10.0)
+    before = tracker.timeout("1K")
+    for _ in range(20):
+        tracker.on_timeout("1K")
+        tracker.on_cancelled("1K")
+    assert tracker.timeout("1K") == before == 20.0
+    stats = tracker.stats()
+    assert stats["1K_timeouts"] == 20
+    assert stats["1K_cancelled"] == 20
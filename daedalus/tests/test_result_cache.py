@@ -0,0 +1,61 @@
+import asyncio
+
+from daedalus.src.result_cache import ImageResultCache, image_cache_key
+
+
+def test_concurrent_misses_share_one_render(tmp_path):
+    cache = ImageResultCache(tmp_path)
+    renders = 0
+
+    async def render():
+        nonlocal renders
+        renders += 1
+        await asyncio.sleep(0.01)
+        return b"image", "image/png"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_render("k", render) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert results == [(b"image", "image/png")] * 5
+    assert renders == 1
+    assert cache.misses == 1
+    assert cache.coalesced == 4
+
+
+def test_render_survives_cancelled_caller_and_lands_in_cache(tmp_path):
+    cache = ImageResultCache(tmp_path)
+
+    async def render():
+        await asyncio.sleep(0.02)
+        return b"image", "image/png"
+
+    async def scenario():
+        caller = asyncio.create_task(cache.get_or_render("k", render))
+        await asyncio.sleep(0.005)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        # Let the shared render finish
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert cache.get("k") == (b"image", "image/png")
+    # A new cache over the same folder finds it too
+    assert ImageResultCache(tmp_path).get("k") == (b"image", "image/png")
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ImageResultCache(tmp_path, max_bytes=10)
+    cache.put("a", b"12345", "image/png")
+    cache.put("b", b"12345", "image/png")
+    cache.get("a")
+    cache.put("c", b"12345", "image/png")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.evictions == 1
+
+
+def test_cache_key_only_changes_with_explicit_variant():
+    key = image_cache_key("model", "prompt", "sha", "9:16", "1K", 0)
+    assert key == image_cache_key("model", "prompt", "sha", "9:16", "1K")
+    assert key != image_cache_key("model", "prompt", "sha", "9:16", "1K", 1)
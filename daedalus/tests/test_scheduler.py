@@ -0,0 +1,85 @@
+import asyncio
+
+from daedalus.src.scheduler import AdaptiveTokenBucket, ImageRequestScheduler, bulk_priority, tier_priority
+
+
+async def _run_all(scheduler: ImageRequestScheduler, requests: list) -> list:
+    """Submits (order_id, priority) requests in order and returns the order they ran in."""
+    ran = []
+
+    def request(order_id):
+        async def call():
+            await asyncio.sleep(0.001)
+            ran.append(order_id)
+        return call
+
+    # Hold the only slot until every request is queued
+    gate = asyncio.Event()
+    blocker = asyncio.create_task(scheduler.run("blocker", gate.wait))
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(scheduler.run(order_id, request(order_id), priority)) for order_id, priority in requests]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocker, *tasks)
+    return ran
+
+
+def test_higher_tiers_run_first():
+    scheduler = ImageRequestScheduler(max_concurrency=1, rate=1000, burst=1000)
+    ran = asyncio.run(_run_all(scheduler, [
+        ("value", tier_priority("Value")),
+        ("smart", tier_priority("Smart")),
+        ("premium", tier_priority("premium")),
+    ]))
+    assert ran == ["premium", "smart", "value"]
+
+
+def test_orders_of_the_same_tier_take_turns():
+    scheduler = ImageRequestScheduler(max_concurrency=1, rate=1000, burst=1000)
+    ran = asyncio.run(_run_all(scheduler, [("a", 3)] * 3 + [("b", 3)] * 3))
+    assert ran == ["a", "b", "a", "b", "a", "b"]
+
+
+def test_bulk_orders_yield_to_every_interactive_order():
+    scheduler = ImageRequestScheduler(max_concurrency=1, rate=1000, burst=1000)
+    ran = asyncio.run(_run_all(scheduler, [
+        ("bulk-value", bulk_priority("Value")),
+        ("bulk-premium", bulk_priority("Premium")),
+        ("value", tier_priority("Value")),
+    ]))
+    assert ran == ["value", "bulk-premium", "bulk-value"]
+
+
+def test_unknown_tier_gets_the_default_priority():
+    assert tier_priority("Gold") == tier_priority("Value")
+    assert tier_priority(None) == tier_priority("Value")
+
+
+def test_cancelled_waiter_releases_nothing():
+    async def scenario():
+        scheduler = ImageRequestScheduler(max_concurrency=1, rate=1000, burst=1000)
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(scheduler.run("a", gate.wait))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(scheduler.run("b", gate.wait))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        gate.set()
+        await blocker
+        await asyncio.gather(waiting, return_exceptions=True)
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0
+    assert stats["queue_depth"] == 0
+
+
+def test_rate_limiter_works_from_several_event_loops():
+    bucket = AdaptiveTokenBucket(rate=200, capacity=1)
+
+    async def scenario():
+        # Contended, so later callers wait on the bucket's lock
+        await asyncio.gather(*(bucket.acquire() for _ in range(3)))
+
+    asyncio.run(scenario())
+    asyncio.run(scenario())
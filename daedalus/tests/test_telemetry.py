@@ -0,0 +1,50 @@
+import json
+import threading
+
+from daedalus.src.telemetry import Telemetry
+
+
+def test_snapshot_while_spans_finish_on_other_threads():
+    telemetry = Telemetry(enabled=True, trace_enabled=True, max_traces=50)
+    stop = threading.Event()
+
+    def work():
+        while not stop.is_set():
+            with telemetry.span("root") as span:
+                for i in range(20):
+                    with telemetry.span("child", index=i):
+                        span.set(**{f"attr{i}": i})
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(50):
+            json.dumps(telemetry.snapshot())
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    traces = telemetry.snapshot()["traces"]
+    assert traces and all(trace["name"] == "root" and len(trace["children"]) == 20 for trace in traces)
+
+
+def test_snapshot_is_detached_from_live_spans():
+    telemetry = Telemetry(enabled=True, trace_enabled=True)
+    with telemetry.span("root") as span:
+        pass
+    snapshot = telemetry.snapshot()
+    span.set(late=True)
+    assert "late" not in snapshot["traces"][0]["attrs"]
+
+
+def test_children_beyond_the_cap_are_only_counted():
+    telemetry = Telemetry(enabled=True, trace_enabled=True, max_children=3)
+    with telemetry.span("root"):
+        for i in range(5):
+            with telemetry.span("child", index=i):
+                pass
+    trace = telemetry.snapshot()["traces"][0]
+    assert [child["attrs"]["index"] for child in trace["children"]] == [0, 1, 2]
+    assert trace["dropped_children"] == 2
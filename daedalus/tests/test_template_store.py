@@ -0,0 +1,73 @@
+import pytest
+from PIL import Image
+
+from daedalus.src.template_store import TEMPLATE_YEAR, TemplateStore
+
+
+def _templates(tmp_path, aspect_ratio: str, size: tuple) -> None:
+    folder = tmp_path / aspect_ratio.replace(":", "_")
+    folder.mkdir(parents=True, exist_ok=True)
+    for month in range(1, 13):
+        Image.new("RGBA", size, (month * 20, 120, 200, 255)).save(folder / f"{month}-{TEMPLATE_YEAR}.png")
+
+
+def test_payloads_are_downscaled_and_shared(tmp_path):
+    _templates(tmp_path, "9:16", (90, 160))
+    store = TemplateStore(tmp_path, max_bytes=10**9)
+
+    preview = store.load("9:16", "preview")
+    assert len(preview) == 12
+    assert preview[0].size == (90, 160)
+    assert preview[0].mime_type == "image/jpeg"
+    # Both resolutions are capped at the 160 px source, so they share one set
+    assert store.load("9:16", "1K") is preview
+    stats = store.stats()
+    assert (stats["sets"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["bytes"] == sum(len(p.data) for p in preview)
+
+
+def test_evicts_least_recently_used_set(tmp_path):
+    for aspect_ratio in ("9:16", "3:4", "4:3"):
+        _templates(tmp_path, aspect_ratio, (60, 80))
+    store = TemplateStore(tmp_path, max_bytes=10**9)
+    set_bytes = sum(len(p.data) for p in store.load("9:16", "1K"))
+    store.max_bytes = set_bytes * 2 + set_bytes // 2
+
+    store.load("3:4", "1K")
+    store.load("9:16", "1K")
+    store.load("4:3", "1K")
+
+    stats = store.stats()
+    assert stats["evictions"] == 1
+    assert stats["sets"] == 2
+    assert stats["bytes"] <= store.max_bytes
+    # 3:4 was the least recently used set
+    store.load("9:16", "1K")
+    assert store.stats()["hits"] == 2
+    store.load("3:4", "1K")
+    assert store.stats()["misses"] == 4
+
+
+def test_oversized_set_is_kept_until_the_next_one(tmp_path):
+    _templates(tmp_path, "9:16", (60, 80))
+    _templates(tmp_path, "3:4", (60, 80))
+    store = TemplateStore(tmp_path, max_bytes=1)
+    store.load("9:16", "1K")
+    assert store.stats()["sets"] == 1
+    store.load("3:4", "1K")
+    stats = store.stats()
+    assert (stats["sets"], stats["evictions"]) == (1, 1)
+    assert stats["bytes"] == sum(len(p.data) for p in store.load("3:4", "1K"))
+
+
+def test_validation_errors(tmp_path):
+    _templates(tmp_path, "9:16", (90, 160))
+    (tmp_path / "9_16" / f"12-{TEMPLATE_YEAR}.png").unlink()
+    store = TemplateStore(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        store.validate("9:16")
+    with pytest.raises(ValueError):
+        store.validate("1:1")
+    Image.new("RGB", (10, 10)).save(tmp_path / "9_16" / f"12-{TEMPLATE_YEAR}.png")
+    with pytest.raises(ValueError, match="mixed sizes"):
+        store.validate("9:16")
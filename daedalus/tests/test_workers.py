@@ -0,0 +1,75 @@
+import asyncio
+import io
+import threading
+
+from PIL import Image
+
+from daedalus.src.workers import LoopLocal, WorkerPool, derive_images, write_bytes
+
+
+def test_pool_works_from_several_event_loops():
+    pool = WorkerPool(io_workers=2, max_pending=1)
+    gate = threading.Event()
+
+    async def scenario():
+        # More calls than slots, so callers wait on the semaphore
+        first = asyncio.ensure_future(pool.run_io(gate.wait, 1))
+        rest = [asyncio.ensure_future(pool.run_io(sum, [i, 1])) for i in range(3)]
+        await asyncio.sleep(0.01)
+        gate.set()
+        return await first, await asyncio.gather(*rest)
+
+    assert asyncio.run(scenario()) == (True, [1, 2, 3])
+    gate.clear()
+    assert asyncio.run(scenario()) == (True, [1, 2, 3])
+
+
+def test_loop_local_is_shared_within_a_loop_only():
+    local = LoopLocal(dict)
+
+    async def get_twice():
+        return local.get(), local.get()
+
+    first, again = asyncio.run(get_twice())
+    assert first is again
+    other, _ = asyncio.run(get_twice())
+    assert other is not first
+
+
+def test_concurrent_writers_of_one_path_never_collide(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    target = tmp_path / "out" / "8-2026.png"
+    payloads = [bytes([i]) * 200_000 for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda data: write_bytes(target, data), payloads))
+    assert target.read_bytes() in payloads
+    assert [path.name for path in target.parent.iterdir()] == ["8-2026.png"]
+
+
+def _png(size: tuple) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, (200, 40, 90, 255)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_derive_images_resamples_every_variant_from_the_source():
+    variants, preview = derive_images(_png((400, 600)), {"2K": 0.5, "1K": 0.25}, output_format="webp", thumbnail_edge=90)
+
+    assert list(variants) == ["2K", "1K"]
+    for name, size in (("2K", (200, 300)), ("1K", (100, 150))):
+        data, mime_type = variants[name]
+        assert mime_type == "image/webp"
+        with Image.open(io.BytesIO(data)) as image:
+            assert (image.format, image.size) == ("WEBP", size)
+    with Image.open(io.BytesIO(preview)) as image:
+        assert (image.format, image.mode, image.size) == ("JPEG", "RGB", (60, 90))
+
+
+def test_derive_images_falls_back_to_png_for_original_format():
+    variants, _ = derive_images(_png((40, 30)), {"1K": 0.01}, output_format="original")
+    data, mime_type = variants["1K"]
+    assert mime_type == "image/png"
+    with Image.open(io.BytesIO(data)) as image:
+        # Never rounds down to an empty image
+        assert image.size == (1, 1)
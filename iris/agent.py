@@ -1,6 +1,4 @@
 from google.adk.agents.llm_agent import Agent
-from google.adk.models.google_llm import Gemini
-from google.genai.types import HttpRetryOptions
 
 import logging
 from .src import logging as iris_logging
@@ -8,6 +6,8 @@ from .src import logging as iris_logging
 logger = logging.getLogger(__name__)
 
 from daedalus.agent import root_agent as daedalus_agent
+from daedalus.src.models import InstrumentedGemini
+from daedalus.src.telemetry import instrument_tool
 
 from .src.agent_tools import (
     get_infographic,
@@ -15,24 +15,21 @@ from .src.agent_tools import (
 )
 
 from .src.agent_persona import IRIS_PERSONA
+from .src.infographics import infographic_store
 
-retry_config=HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1, # Initial delay before first retry (in seconds)
-    http_status_codes=[429, 500, 503, 504] # Retry on these HTTP errors
-)
+# Infographics are sent in almost every sales conversation; read them once at startup
+infographic_store.preload()
 
 root_agent = Agent(
-    model=Gemini(
-        model="gemini-2.5-flash",
-        retry_options=retry_config
-    ),
+    # Shares the process-wide client and its retry settings (see daedalus/src/clients.py)
+    model=InstrumentedGemini(model="gemini-2.5-flash"),
     name='iris',
     description='Iris, "Assistant Sales Manager" at Invysia',
     instruction=IRIS_PERSONA,
-    tools=[get_infographic, fill_questionnaire],
+    tools=[instrument_tool(get_infographic), instrument_tool(fill_questionnaire)],
     sub_agents=[daedalus_agent],
+    # Tag every log record of the turn with its session and order ids
+    before_agent_callback=iris_logging.bind_log_context_callback,
 )
 
 logger.info("Iris agent initialized")
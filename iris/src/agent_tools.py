@@ -1,6 +1,5 @@
-from google.genai.types import Part
-from pathlib import Path
 from google.adk.tools import ToolContext
+from .infographics import infographic_store, INFOGRAPHICS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,45 +14,28 @@ async def get_infographic(process_name: str, tool_context: ToolContext) -> dict:
     Returns:
         A confirmation message that the infographic has been generated with ID.
     """
-    # Map process names to image file paths
-    assets_dir = Path(__file__).parent.parent / "assets"
-    
-    infographic_map = {
-        "buying_process": assets_dir / "buying_process.jpg",
-        "product_tiers": assets_dir / "product_tiers.jpg"
-    }
-    
-    if process_name not in infographic_map:
+    if process_name not in INFOGRAPHICS:
         logger.error(f"Unsupported process name: {process_name}")
         raise ValueError(f"Unsupported process name for infographic: {process_name}")
     
     logger.info(f"Retrieving infographic for: {process_name}")
-    image_path = infographic_map[process_name]
-    
-    # Check if file exists locally
-    if image_path.exists():
-        with open(image_path, 'rb') as f:
-            image_bytes = f.read()
-        mime_type = "image/jpeg" 
-    else:
-        # Fallback: fetch a placeholder image from the web
-        # In production, you should have the actual infographics stored locally
-        import requests
-        response = requests.get("https://fastly.picsum.photos/id/156/800/600.jpg")
-        response.raise_for_status()
-        logger.warning(f"Using placeholder image for {process_name}")
-        image_bytes = response.content
-        mime_type = "image/jpeg"
-    # Create Part with inline_data
-    image_part = Part.from_bytes(
-        data=image_bytes,
-        mime_type=mime_type
-    )
+    asset = await infographic_store.get(process_name)
+
+    # The session already holds these exact bytes, so don't store another version
+    sent = tool_context.state.get("infographic_artifacts", {})
+    previous = sent.get(process_name)
+    if previous and previous["sha256"] == asset.sha256:
+        logger.info(f"Infographic {process_name} already sent in this session (version {previous['version']})")
+        return {"status": "success", "filename": process_name, "version": previous["version"]}
 
     version = await tool_context.save_artifact(
         filename=process_name,
-        artifact=image_part,
+        artifact=asset.part,
     )
+    # Assign a new dict so the state delta is recorded
+    tool_context.state["infographic_artifacts"] = {
+        **sent, process_name: {"sha256": asset.sha256, "version": version},
+    }
 
     return {"status": "success", "filename": process_name, "version": version}
 
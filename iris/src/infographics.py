@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from google.genai import types
+from daedalus.src.workers import worker_pool, write_bytes, LoopLocal
+import logging
+
+logger = logging.getLogger(__name__)
+
+ASSETS_DIR = Path(__file__).parent.parent / "assets"
+CACHE_DIR = Path(os.environ.get("IRIS_CACHE_DIR", Path(__file__).parent.parent.parent / ".cache" / "iris"))
+
+INFOGRAPHICS = {
+    "buying_process": "buying_process.jpg",
+    "product_tiers": "product_tiers.jpg",
+}
+INFOGRAPHIC_MIME_TYPE = "image/jpeg"
+
+# Placeholder used when an infographic is missing from the assets folder.
+# In production, the actual infographics should be stored locally.
+FALLBACK_URL = os.environ.get("IRIS_INFOGRAPHIC_FALLBACK_URL", "https://fastly.picsum.photos/id/156/800/600.jpg")
+FETCH_TIMEOUT_SECONDS = float(os.environ.get("IRIS_FETCH_TIMEOUT", "10"))
+
+
+class InfographicAsset:
+    """An infographic's bytes, content hash and ready-to-send `Part`."""
+
+    __slots__ = ("name", "data", "mime_type", "sha256", "part")
+
+    def __init__(self, name: str, data: bytes, mime_type: str = INFOGRAPHIC_MIME_TYPE):
+        self.name = name
+        self.data = data
+        self.mime_type = mime_type
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.part = types.Part.from_bytes(data=data, mime_type=mime_type)
+
+
+class InfographicStore:
+    """
+    Process-wide cache of the infographics Iris sends during sales conversations.
+
+    Local assets are read once; missing ones are fetched asynchronously from
+    the fallback URL and kept in a disk cache so they are downloaded at most once.
+    """
+
+    def __init__(self, assets_dir: Path = ASSETS_DIR, cache_dir: Path = CACHE_DIR, fallback_url: str = FALLBACK_URL):
+        self.assets_dir = Path(assets_dir)
+        self.cache_dir = Path(cache_dir)
+        self.fallback_url = fallback_url
+        self._assets: dict = {}
+        # Per event loop: {name: asyncio.Lock}
+        self._locks = LoopLocal(dict)
+
+    def _read_local(self, name: str):
+        """Returns the asset from the assets folder or the disk cache, or None."""
+        for path in (self.assets_dir / INFOGRAPHICS[name], self.cache_dir / INFOGRAPHICS[name]):
+            if path.exists():
+                return InfographicAsset(name, path.read_bytes())
+        return None
+
+    def preload(self):
+        """Loads every infographic available on disk (e.g. at startup); never touches the network."""
+        for name in INFOGRAPHICS:
+            if name not in self._assets:
+                asset = self._read_local(name)
+                if asset is not None:
+                    self._assets[name] = asset
+        logger.info(f"Preloaded infographics: {sorted(self._assets)}")
+
+    async def get(self, name: str) -> InfographicAsset:
+        """
+        Returns an infographic, loading it on first use.
+
+        Raises:
+            ValueError: If `name` is not a known infographic.
+        """
+        if name not in INFOGRAPHICS:
+            raise ValueError(f"Unsupported process name for infographic: {name}")
+        asset = self._assets.get(name)
+        if asset is not None:
+            return asset
+
+        # Concurrent first requests share one read or download
+        async with self._locks.get().setdefault(name, asyncio.Lock()):
+            asset = self._assets.get(name)
+            if asset is None:
+                asset = await worker_pool.run_io(self._read_local, name)
+                if asset is None:
+                    asset = InfographicAsset(name, await self._fetch(name))
+                self._assets[name] = asset
+        return asset
+
+    async def _fetch(self, name: str) -> bytes:
+        import httpx
+
+        logger.warning(f"Using placeholder image for {name}")
+        async with httpx.AsyncClient(timeout=FETCH_TIMEOUT_SECONDS, follow_redirects=True) as client:
+            response = await client.get(self.fallback_url)
+            response.raise_for_status()
+        await worker_pool.run_io(write_bytes, self.cache_dir / INFOGRAPHICS[name], response.content)
+        return response.content
+
+
+infographic_store = InfographicStore()
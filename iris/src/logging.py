@@ -1,38 +1,216 @@
+import atexit
+import contextvars
+import json
 import logging
 import os
+import queue
+import random
+import threading
+import time
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# "text" (the original format) or "json" (one JSON object per line)
+LOG_FORMAT = os.environ.get("IRIS_LOG_FORMAT", "text")
+# DEBUG logs every google_adk event and httpx request; only set it while debugging
+LOG_LEVEL = os.environ.get("IRIS_LOG_LEVEL", "INFO")
+# Per-logger levels, e.g. "google_adk=INFO,httpx=WARNING". httpcore logs every
+# socket event at DEBUG, which is never useful here.
+LOG_LEVELS = os.environ.get("IRIS_LOG_LEVELS", "httpcore=INFO")
+# Per-logger caps on records per second below WARNING, e.g. "google_adk=20,httpx=5"
+LOG_RATE_LIMITS = os.environ.get("IRIS_LOG_RATE_LIMITS", "")
+# Per-logger fraction of records below WARNING to keep, e.g. "httpx=0.1"
+LOG_SAMPLING = os.environ.get("IRIS_LOG_SAMPLING", "")
+# Records beyond this many waiting for the writer thread are dropped, never blocking the caller
+LOG_QUEUE_SIZE = int(os.environ.get("IRIS_LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(filename)s:%(lineno)s - %(levelname)s - [%(session_id)s/%(order_id)s] - %(message)s"
+
+session_id_var = contextvars.ContextVar("iris_session_id", default="-")
+order_id_var = contextvars.ContextVar("iris_order_id", default="-")
+
+_listener = None
+
+
+def stop_logging():
+    """Writes out every queued record and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def bind_log_context(session_id: str = None, order_id: str = None):
+    """Attaches session/order ids to every record logged from the current async context."""
+    if session_id is not None:
+        session_id_var.set(session_id)
+    if order_id is not None:
+        order_id_var.set(order_id)
+
+
+def bind_log_context_callback(callback_context):
+    """
+    `before_agent_callback` that binds the ADK session and invocation ids to the log context.
+
+    Tools and sub-agents run in the same (or a copied) context, so their records carry the ids too.
+    """
+    bind_log_context(session_id=callback_context.session.id, order_id=callback_context.invocation_id)
+    return None
+
+
+def _parse_mapping(spec: str, convert) -> dict:
+    """Parses "name=value,name=value" into a dict, skipping malformed entries."""
+    mapping = {}
+    for item in spec.split(","):
+        name, sep, value = item.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            mapping[name.strip()] = convert(value.strip())
+        except ValueError:
+            print(f"⚠️ Ignoring invalid logging setting: {item}")
+    return mapping
+
+
+def _configured_value(name: str, settings: dict):
+    # The most specific configured parent logger wins, like logging levels
+    while name:
+        if name in settings:
+            return settings[name]
+        name = name.rpartition(".")[0]
+    return None
+
+
+class ContextFilter(logging.Filter):
+    """Stamps session and order ids on records; runs on the calling thread, where the context lives."""
+
+    def filter(self, record):
+        record.session_id = session_id_var.get()
+        record.order_id = order_id_var.get()
+        return True
+
+
+class ThrottleFilter(logging.Filter):
+    """
+    Rate-limits and samples noisy loggers before their records are queued.
+
+    WARNING and above always pass. Dropped records are counted and reported
+    by the next record that gets through.
+    """
+
+    def __init__(self, rate_limits: dict, sampling: dict):
+        super().__init__()
+        self.rate_limits = rate_limits
+        self.sampling = sampling
+        self._windows = {}
+        self._dropped = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not (self.rate_limits or self.sampling):
+            return True
+        fraction = _configured_value(record.name, self.sampling)
+        if fraction is not None and random.random() >= fraction:
+            return self._drop(record.name)
+        limit = _configured_value(record.name, self.rate_limits)
+        if limit is not None:
+            now = int(time.monotonic())
+            with self._lock:
+                second, count = self._windows.get(record.name, (now, 0))
+                if second != now:
+                    second, count = now, 0
+                self._windows[record.name] = (second, count + 1)
+            if count >= limit:
+                return self._drop(record.name)
+        dropped = self._dropped.pop(record.name, 0)
+        if dropped:
+            record.msg = f"{record.msg} [{dropped} earlier records from {record.name} dropped]"
+        return True
+
+    def _drop(self, name: str) -> bool:
+        with self._lock:
+            self._dropped[name] = self._dropped.get(name, 0) + 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": f"{record.filename}:{record.lineno}",
+            "session_id": getattr(record, "session_id", "-"),
+            "order_id": getattr(record, "order_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queues records without ever blocking; drops them if the writer thread falls behind."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def enqueue(self, record):
+        if self._unreported:
+            record.msg = f"{record.msg} [{self._unreported} records dropped, log queue full]"
+        try:
+            self.queue.put_nowait(record)
+            self._unreported = 0
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
 
 def setup_logging():
+    """
+    Routes all logging through a queue to a background writer thread.
+
+    Log calls on the event loop only format the message and enqueue it; the
+    rotating file handler does its disk I/O and rotation on the listener thread.
+    """
+    global _listener
     log_path = Path(__file__).parent.parent.parent / "invysia-store.log"
-    
+
     # Create a root logger
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-    
+    logger.setLevel(LOG_LEVEL)
+    for name, level in _parse_mapping(LOG_LEVELS, str.upper).items():
+        logging.getLogger(name).setLevel(level)
+
     # Check if handlers are already configured to avoid duplicate logs
     if not logger.handlers:
-        # Create RotatingFileHandler
         # Max size 5MB, keep 3 backup files
-        handler = RotatingFileHandler(
-            log_path, 
-            maxBytes=5*1024*1024, 
+        file_handler = RotatingFileHandler(
+            log_path,
+            maxBytes=5*1024*1024,
             backupCount=3,
             encoding='utf-8'
         )
-        
-        formatter = logging.Formatter("%(asctime)s - %(name)s - %(filename)s:%(lineno)s - %(levelname)s - %(message)s")
-        handler.setFormatter(formatter)
-        
-        logger.addHandler(handler)
-        
-        # Also add a stream handler to print to console if needed, 
-        # but for now we stick to file as per original intent, 
-        # maybe adding a basic console handler for critical errors is good practice,
-        # but the user request specifically focused on rotation vs deletion.
-        # We'll stick to the file handler as the primary output to match previous behavior but better.
+        file_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+        queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        queue_handler.addFilter(ContextFilter())
+        queue_handler.addFilter(ThrottleFilter(
+            _parse_mapping(LOG_RATE_LIMITS, int),
+            _parse_mapping(LOG_SAMPLING, float),
+        ))
+        logger.addHandler(queue_handler)
+
+        _listener = QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        # Flush what is still queued on interpreter exit
+        atexit.register(stop_logging)
 
     print(f"✅ Logging configured at {log_path}")
 
 # Initialize logging on import
-setup_logging()
\ No newline at end of file
+setup_logging()
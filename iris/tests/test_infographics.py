@@ -0,0 +1,54 @@
+import asyncio
+
+from iris.src import agent_tools
+from iris.src.infographics import INFOGRAPHICS, InfographicStore
+
+
+class FakeToolContext:
+    """Just enough of ADK's ToolContext for `get_infographic`."""
+
+    def __init__(self):
+        self.state = {}
+        self.saved = []
+
+    async def save_artifact(self, filename: str, artifact) -> int:
+        self.saved.append(filename)
+        return len(self.saved) - 1
+
+
+def _store(tmp_path, monkeypatch) -> InfographicStore:
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    for name, filename in INFOGRAPHICS.items():
+        (assets / filename).write_bytes(f"{name} v1".encode())
+    store = InfographicStore(assets, tmp_path / "cache", fallback_url="http://invalid.test/")
+    monkeypatch.setattr(agent_tools, "infographic_store", store)
+    return store
+
+
+def test_infographic_is_saved_once_per_session(tmp_path, monkeypatch):
+    _store(tmp_path, monkeypatch)
+    ctx = FakeToolContext()
+
+    async def scenario():
+        first = await agent_tools.get_infographic("buying_process", ctx)
+        again = await agent_tools.get_infographic("buying_process", ctx)
+        other = await agent_tools.get_infographic("product_tiers", ctx)
+        return first, again, other
+
+    first, again, other = asyncio.run(scenario())
+    assert ctx.saved == ["buying_process", "product_tiers"]
+    assert again == first == {"status": "success", "filename": "buying_process", "version": 0}
+    assert other["version"] == 1
+
+
+def test_changed_infographic_is_saved_again(tmp_path, monkeypatch):
+    store = _store(tmp_path, monkeypatch)
+    ctx = FakeToolContext()
+    asyncio.run(agent_tools.get_infographic("buying_process", ctx))
+
+    (store.assets_dir / INFOGRAPHICS["buying_process"]).write_bytes(b"buying_process v2")
+    store._assets.clear()
+    result = asyncio.run(agent_tools.get_infographic("buying_process", ctx))
+    assert ctx.saved == ["buying_process", "buying_process"]
+    assert result["version"] == 1
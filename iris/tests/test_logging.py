@@ -0,0 +1,46 @@
+import logging
+import queue
+import types
+
+from iris.src import logging as iris_logging
+from iris.src.logging import DroppingQueueHandler, ThrottleFilter
+
+
+def _record(name: str, level: int = logging.INFO, msg: str = "hello") -> logging.LogRecord:
+    return logging.makeLogRecord({"name": name, "levelno": level, "levelname": logging.getLevelName(level), "msg": msg})
+
+
+def test_rate_limit_drops_records_and_reports_them(monkeypatch):
+    clock = types.SimpleNamespace(monotonic=lambda: 100.0)
+    monkeypatch.setattr(iris_logging, "time", clock)
+    throttle = ThrottleFilter({"httpx": 2}, {})
+
+    assert [throttle.filter(_record("httpx._client")) for _ in range(4)] == [True, True, False, False]
+    # Warnings always pass, and other loggers are not limited
+    assert throttle.filter(_record("httpx", logging.WARNING))
+    assert throttle.filter(_record("google_adk"))
+
+    clock.monotonic = lambda: 101.0
+    record = _record("httpx._client")
+    assert throttle.filter(record)
+    assert record.msg == "hello [2 earlier records from httpx._client dropped]"
+
+
+def test_sampling_uses_the_most_specific_logger():
+    throttle = ThrottleFilter({}, {"google_adk": 0.0, "google_adk.runners": 1.0})
+    assert not throttle.filter(_record("google_adk.models"))
+    assert throttle.filter(_record("google_adk.runners.x"))
+    assert throttle.filter(_record("google_adk.models", logging.ERROR))
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    for index in range(3):
+        handler.handle(_record("iris", msg=f"record {index}"))
+    assert handler.dropped == 2
+    assert handler.queue.get_nowait().getMessage() == "record 0"
+
+    handler.handle(_record("iris", msg="record 3"))
+    assert handler.queue.get_nowait().getMessage() == "record 3 [2 records dropped, log queue full]"
+    handler.handle(_record("iris", msg="record 4"))
+    assert handler.queue.get_nowait().getMessage() == "record 4"